@@ -0,0 +1,45 @@
+import hashlib
+import secrets
+
+from django.contrib.auth import get_user_model
+from django.db import models
+
+from core.models import CreatedModel
+
+User = get_user_model()
+
+
+def digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class TokenManager(models.Manager):
+    def issue(self, user):
+        """Replaces the user's token, returns the new key."""
+        key = secrets.token_hex(20)
+        self.update_or_create(user=user, defaults={'digest': digest(key)})
+        return key
+
+    def user_for(self, key):
+        """Owner of the key, None for an unknown key."""
+        token = self.select_related('user').filter(
+            digest=digest(key)
+        ).first()
+        return token.user if token else None
+
+
+class Token(CreatedModel):
+    """API key of a user, only its SHA-256 digest is stored."""
+    user = models.OneToOneField(
+        User,
+        related_name='api_token',
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        help_text='Пользователь'
+    )
+    digest = models.CharField('Хэш ключа', max_length=64, unique=True)
+
+    objects = TokenManager()
+
+    def __str__(self):
+        return f'{self.user}'
@@ -0,0 +1,74 @@
+"""JSON representations of posts, comments, groups and profiles.
+
+Each representation is a mapping of field name to getter. Clients may
+ask for a subset of fields with ``?fields=id,text``.
+"""
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def _image(post, request):
+    if not post.image:
+        return None
+    return request.build_absolute_uri(post.image.url)
+
+
+def _comments(post, request):
+    stats = getattr(post, 'stats', None)
+    return stats.comments if stats is not None else 0
+
+
+POST_FIELDS = {
+    'id': lambda post, request: post.pk,
+    'text': lambda post, request: post.text,
+    'created': lambda post, request: post.created,
+    'author': lambda post, request: post.author.username,
+    'group': lambda post, request: post.group.slug if post.group else None,
+    'image': _image,
+    'comments': _comments,
+}
+
+COMMENT_FIELDS = {
+    'id': lambda comment, request: comment.pk,
+    'post': lambda comment, request: comment.post_id,
+    'text': lambda comment, request: comment.text,
+    'created': lambda comment, request: comment.created,
+    'author': lambda comment, request: comment.author.username,
+}
+
+GROUP_FIELDS = {
+    'id': lambda group, request: group.pk,
+    'title': lambda group, request: group.title,
+    'slug': lambda group, request: group.slug,
+    'description': lambda group, request: group.description,
+}
+
+PROFILE_FIELDS = {
+    'username': lambda user, request: user.username,
+    'first_name': lambda user, request: user.first_name,
+    'last_name': lambda user, request: user.last_name,
+    'posts': lambda user, request: user.stats.posts,
+    'followers': lambda user, request: user.stats.followers,
+    'following': lambda user, request: user.stats.following,
+}
+
+
+def select_fields(fields, request):
+    """Getters of the fields requested with ?fields=, all by default."""
+    requested = request.GET.get('fields')
+    if not requested:
+        return fields
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise FieldsError(
+            f'Неизвестные поля: {", ".join(unknown)}, '
+            f'доступны: {", ".join(fields)}'
+        )
+    return {name: fields[name] for name in names}
+
+
+def serialize(obj, fields, request):
+    return {name: getter(obj, request) for name, getter in fields.items()}
@@ -0,0 +1,263 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+
+from api.models import Token
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.author,
+            group=cls.group
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def send(self, client, method, address, data):
+        return getattr(client, method)(
+            address, json.dumps(data), content_type='application/json'
+        )
+
+    def test_post_list(self):
+        """Post list returns serialized posts and cursors"""
+        response = self.client.get(reverse('api:posts'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['results'][0]['id'], self.post.pk)
+        self.assertEqual(data['results'][0]['author'], 'writer')
+        self.assertEqual(data['results'][0]['group'], 'test-slug')
+        self.assertEqual(data['results'][0]['comments'], 0)
+        self.assertIsNone(data['next_cursor'])
+
+    def test_post_list_cursor(self):
+        """Next cursor leads to the following page"""
+        Post.objects.bulk_create([
+            Post(text=f'Пост {number}', author=self.author)
+            for number in range(settings.POSTS_AMOUNT)
+        ])
+        first = self.client.get(reverse('api:posts')).json()
+        second = self.client.get(
+            reverse('api:posts'), {'cursor': first['next_cursor']}
+        ).json()
+        self.assertEqual(second['results'][0]['id'], self.post.pk)
+        broken = self.client.get(reverse('api:posts'), {'cursor': 'broken'})
+        self.assertEqual(broken.status_code, 400)
+
+    def test_sparse_fields(self):
+        """Only the requested fields are returned"""
+        response = self.client.get(
+            reverse('api:post', kwargs={'post_id': self.post.pk}),
+            {'fields': 'id,text'}
+        )
+        self.assertEqual(
+            response.json(), {'id': self.post.pk, 'text': 'Тестовый пост'}
+        )
+        response = self.client.get(reverse('api:posts'), {'fields': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_not_modified(self):
+        """Unchanged resource answers 304 until its content changes"""
+        address = reverse('api:post', kwargs={'post_id': self.post.pk})
+        response = self.client.get(address)
+        etag = response['ETag']
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comments'], 1)
+
+    def test_feed_not_modified(self):
+        """Feed validators change with a new post"""
+        address = reverse('api:posts')
+        etag = self.client.get(address)['ETag']
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_post(self):
+        """Authorized user creates a post, anonymous gets 401"""
+        data = {'text': 'Из API', 'group': self.group.pk}
+        response = self.send(self.client, 'post', reverse('api:posts'), data)
+        self.assertEqual(response.status_code, 401)
+        response = self.send(
+            self.author_client, 'post', reverse('api:posts'), data
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Post.objects.filter(
+            text='Из API', author=self.author, group=self.group
+        ).exists())
+        response = self.send(
+            self.author_client, 'post', reverse('api:posts'), {'text': ''}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+
+    def test_edit_and_delete_post(self):
+        """Only the author edits and deletes a post"""
+        post = Post.objects.create(text='Черновик', author=self.author)
+        address = reverse('api:post', kwargs={'post_id': post.pk})
+        response = self.send(
+            self.reader_client, 'patch', address, {'text': 'Чужой'}
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.send(
+            self.author_client, 'patch', address, {'text': 'Готово'}
+        )
+        self.assertEqual(response.json()['text'], 'Готово')
+        self.assertEqual(self.reader_client.delete(address).status_code, 403)
+        self.assertEqual(self.author_client.delete(address).status_code, 204)
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+
+    def test_comments(self):
+        """Comments are listed and created"""
+        address = reverse('api:comments', kwargs={'post_id': self.post.pk})
+        response = self.send(
+            self.reader_client, 'post', address, {'text': 'Отлично'}
+        )
+        self.assertEqual(response.status_code, 201)
+        results = self.client.get(address).json()['results']
+        self.assertEqual(results[0]['text'], 'Отлично')
+        self.assertEqual(results[0]['author'], 'reader')
+
+    def test_groups_and_profile(self):
+        """Groups, group posts and profiles are available"""
+        groups = self.client.get(reverse('api:groups')).json()['results']
+        self.assertEqual(groups[0]['slug'], 'test-slug')
+        posts = self.client.get(
+            reverse('api:group_posts', kwargs={'slug': 'test-slug'})
+        ).json()['results']
+        self.assertEqual(posts[0]['id'], self.post.pk)
+        profile = self.client.get(
+            reverse('api:profile', kwargs={'username': 'writer'})
+        ).json()
+        self.assertEqual(profile['posts'], 1)
+        response = self.client.get(
+            reverse('api:group', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_follows(self):
+        """Follow, list followed authors, read their feed, unfollow"""
+        self.assertEqual(
+            self.client.get(reverse('api:follows')).status_code, 401
+        )
+        response = self.send(
+            self.reader_client, 'post', reverse('api:follows'),
+            {'author': 'writer'}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            self.reader_client.get(reverse('api:follows')).json(),
+            {'results': ['writer']}
+        )
+        feed = self.reader_client.get(reverse('api:follow_feed'))
+        self.assertEqual(feed.json()['results'][0]['id'], self.post.pk)
+        response = self.reader_client.get(
+            reverse('api:follow_feed'), HTTP_IF_NONE_MATCH=feed['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        response = self.reader_client.delete(
+            reverse('api:follow', kwargs={'username': 'writer'})
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Follow.objects.filter(user=self.reader).exists())
+
+    def test_follow_self(self):
+        """Following yourself is rejected"""
+        response = self.send(
+            self.author_client, 'post', reverse('api:follows'),
+            {'author': 'writer'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_multipart_patch(self):
+        """Multipart PATCH bodies are parsed"""
+        post = Post.objects.create(text='Черновик', author=self.author)
+        response = self.author_client.patch(
+            reverse('api:post', kwargs={'post_id': post.pk}),
+            encode_multipart(BOUNDARY, {'text': 'Из формы'}),
+            content_type=MULTIPART_CONTENT
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['text'], 'Из формы')
+
+
+class ApiAuthTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='writer', password='password'
+        )
+
+    def setUp(self) -> None:
+        self.client = Client(enforce_csrf_checks=True)
+
+    def create_post(self, **headers):
+        return self.client.post(
+            reverse('api:posts'), json.dumps({'text': 'Из API'}),
+            content_type='application/json', **headers
+        )
+
+    def test_token_writes(self):
+        """Token clients write without CSRF, bad tokens get 401"""
+        response = self.client.post(
+            reverse('api:token'),
+            json.dumps({'username': 'writer', 'password': 'password'}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        key = response.json()['token']
+        self.assertFalse(Token.objects.filter(digest=key).exists())
+        response = self.create_post(HTTP_AUTHORIZATION=f'Token {key}')
+        self.assertEqual(response.status_code, 201)
+        response = self.create_post(HTTP_AUTHORIZATION='Token nope')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+        self.assertIn('error', response.json())
+
+    def test_wrong_password(self):
+        """Token is not issued for a wrong password"""
+        response = self.client.post(
+            reverse('api:token'),
+            json.dumps({'username': 'writer', 'password': 'wrong'}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_session_writes_need_csrf(self):
+        """Session writes without the CSRF token get a JSON 403"""
+        self.client.force_login(self.user)
+        response = self.create_post()
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('error', response.json())
+        self.client.get(reverse('posts:post_create'))
+        token = self.client.cookies[settings.CSRF_COOKIE_NAME].value
+        response = self.create_post(HTTP_X_CSRFTOKEN=token)
+        self.assertEqual(response.status_code, 201)
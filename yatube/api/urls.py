@@ -0,0 +1,48 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('token/', views.TokenView.as_view(), name='token'),
+    path('posts/', views.PostListView.as_view(), name='posts'),
+    path(
+        'posts/<int:post_id>/',
+        views.PostDetailView.as_view(),
+        name='post'
+    ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.CommentListView.as_view(),
+        name='comments'
+    ),
+    path('groups/', views.GroupListView.as_view(), name='groups'),
+    path(
+        'groups/<slug:slug>/',
+        views.GroupDetailView.as_view(),
+        name='group'
+    ),
+    path(
+        'groups/<slug:slug>/posts/',
+        views.GroupPostsView.as_view(),
+        name='group_posts'
+    ),
+    path(
+        'profiles/<str:username>/',
+        views.ProfileView.as_view(),
+        name='profile'
+    ),
+    path(
+        'profiles/<str:username>/posts/',
+        views.ProfilePostsView.as_view(),
+        name='profile_posts'
+    ),
+    path('follow/', views.FollowFeedView.as_view(), name='follow_feed'),
+    path('follows/', views.FollowListView.as_view(), name='follows'),
+    path(
+        'follows/<str:username>/',
+        views.FollowDetailView.as_view(),
+        name='follow'
+    ),
+]
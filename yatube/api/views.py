@@ -0,0 +1,368 @@
+import json
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.http import Http404, HttpResponse, JsonResponse, QueryDict
+from django.http.multipartparser import MultiPartParser, MultiPartParserError
+from django.middleware.csrf import CsrfViewMiddleware
+from django.shortcuts import get_object_or_404
+from django.utils.datastructures import MultiValueDict
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from core.conditional import ConditionalGetMixin
+from core.paginators import CursorPaginator, InvalidCursor
+from posts import cards, counters, feeds, pages
+from posts.forms import CommentForm, PostForm
+from posts.models import Follow, Group, Post
+
+from .models import Token
+from .serializers import (COMMENT_FIELDS, GROUP_FIELDS, POST_FIELDS,
+                          PROFILE_FIELDS, FieldsError, select_fields,
+                          serialize)
+
+User = get_user_model()
+
+
+class BadRequest(Exception):
+    pass
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def feed_keys(*feeds):
+    return [pages.FEED_KEY.format(feed) for feed in feeds]
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ApiView(ConditionalGetMixin, View):
+    """JSON endpoint with conditional GET.
+
+    Responses are validated by the generations of the feeds they show,
+    so a client polling an unchanged resource gets 304 before any query
+    runs. Anonymous clients may only use public_methods.
+
+    Clients authenticate with an "Authorization: Token <key>" header,
+    see TokenView, or with the site session. Session writes still need
+    the CSRF token, as browsers send the session cookie on their own.
+    """
+    fields = {}
+    public_methods = ('get', 'head', 'options')
+    safe_methods = ('get', 'head', 'options', 'trace')
+
+    def authenticate(self, request):
+        """Sets request.user from the token, returns an error if any."""
+        header = request.META.get('HTTP_AUTHORIZATION')
+        if header is None:
+            if (
+                request.user.is_authenticated
+                and request.method.lower() not in self.safe_methods
+                and CsrfViewMiddleware().process_view(
+                    request, None, (), {}
+                ) is not None
+            ):
+                return error('Неверный CSRF-токен', 403)
+            return None
+        scheme, _, key = header.partition(' ')
+        user = None
+        if scheme == 'Token' and key:
+            user = Token.objects.user_for(key.strip())
+        if user is None or not user.is_active:
+            response = error('Неверный токен', 401)
+            response['WWW-Authenticate'] = 'Token'
+            return response
+        request.user = user
+        return None
+
+    def dispatch(self, request, *args, **kwargs):
+        response = self.authenticate(request)
+        if response is not None:
+            return response
+        if (
+            request.method.lower() not in self.public_methods
+            and not request.user.is_authenticated
+        ):
+            return error('Необходима авторизация', 401)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return error('Не найдено', 404)
+        except (BadRequest, FieldsError, InvalidCursor) as exception:
+            return error(str(exception), 400)
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        allowed = super().http_method_not_allowed(request, *args, **kwargs)
+        response = error('Метод не поддерживается', allowed.status_code)
+        response['Allow'] = allowed['Allow']
+        return response
+
+    def parse_body(self):
+        """(data, files) of JSON, urlencoded or multipart writes."""
+        request = self.request
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError:
+                raise BadRequest('Неверный JSON')
+            if not isinstance(data, dict):
+                raise BadRequest('Ожидается JSON-объект')
+            return data, MultiValueDict()
+        if request.method == 'POST':
+            return request.POST, request.FILES
+        if request.content_type == 'multipart/form-data':
+            try:
+                return MultiPartParser(
+                    request.META, BytesIO(request.body),
+                    request.upload_handlers, request.encoding
+                ).parse()
+            except MultiPartParserError:
+                raise BadRequest('Неверное тело multipart')
+        return QueryDict(request.body), MultiValueDict()
+
+    def get_data(self):
+        return self.parse_body()[0]
+
+    def render(self, obj, status=200):
+        fields = select_fields(self.fields, self.request)
+        return JsonResponse(
+            serialize(obj, fields, self.request), status=status
+        )
+
+    def form_errors(self, form):
+        return JsonResponse({'errors': form.errors}, status=400)
+
+
+class CursorListView(ApiView):
+    """Keyset pages of a queryset, see core.paginators."""
+    paginate_by = settings.POSTS_AMOUNT
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        fields = select_fields(self.fields, request)
+        paginator = CursorPaginator(self.get_queryset(), self.paginate_by)
+        page = paginator.page(request.GET.get('cursor'))
+        return JsonResponse({
+            'results': [serialize(obj, fields, request) for obj in page],
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
+        })
+
+
+class PostListView(CursorListView):
+    fields = POST_FIELDS
+
+    def get_version_keys(self):
+        return feed_keys(pages.index_feed(), pages.groups_feed())
+
+    def get_queryset(self):
+        return feeds.index_feed()
+
+    def post(self, request, *args, **kwargs):
+        data, files = self.parse_body()
+        form = PostForm(data, files)
+        if not form.is_valid():
+            return self.form_errors(form)
+        post = form.save(commit=False)
+        post.author = request.user
+        post.save()
+        return self.render(post, status=201)
+
+
+class PostDetailView(ApiView):
+    fields = POST_FIELDS
+
+    def get_version_keys(self):
+        author_id = Post.objects.filter(
+            pk=self.kwargs['post_id']
+        ).values_list('author_id', flat=True).first()
+        if author_id is None:
+            return None
+        return [
+            cards.POST_KEY.format(self.kwargs['post_id']),
+            cards.AUTHOR_KEY.format(author_id),
+            *feed_keys(pages.groups_feed()),
+        ]
+
+    def get_post(self):
+        return get_object_or_404(feeds.posts(), pk=self.kwargs['post_id'])
+
+    def get(self, request, *args, **kwargs):
+        return self.render(self.get_post())
+
+    def patch(self, request, *args, **kwargs):
+        post = get_object_or_404(Post, pk=self.kwargs['post_id'])
+        if post.author_id != request.user.pk:
+            return error('Изменять пост может только автор', 403)
+        changes, files = self.parse_body()
+        data = {'text': post.text, 'group': post.group_id}
+        data.update(changes.items())
+        form = PostForm(data, files, instance=post)
+        if not form.is_valid():
+            return self.form_errors(form)
+        form.save()
+        return self.render(self.get_post())
+
+    def delete(self, request, *args, **kwargs):
+        post = get_object_or_404(Post, pk=self.kwargs['post_id'])
+        if post.author_id != request.user.pk:
+            return error('Удалять пост может только автор', 403)
+        post.delete()
+        return HttpResponse(status=204)
+
+
+class CommentListView(CursorListView):
+    fields = COMMENT_FIELDS
+    paginate_by = settings.COMMENTS_AMOUNT
+
+    def get_version_keys(self):
+        return [cards.POST_KEY.format(self.kwargs['post_id'])]
+
+    def get_queryset(self):
+        post = get_object_or_404(
+            Post.objects.only('pk'), pk=self.kwargs['post_id']
+        )
+        return feeds.comments(post)
+
+    def post(self, request, *args, **kwargs):
+        post = get_object_or_404(
+            Post.objects.only('pk'), pk=self.kwargs['post_id']
+        )
+        form = CommentForm(self.get_data())
+        if not form.is_valid():
+            return self.form_errors(form)
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post = post
+        comment.save()
+        return self.render(comment, status=201)
+
+
+class GroupListView(ApiView):
+    fields = GROUP_FIELDS
+
+    def get_version_keys(self):
+        return feed_keys(pages.groups_feed())
+
+    def get(self, request, *args, **kwargs):
+        fields = select_fields(self.fields, request)
+        return JsonResponse({
+            'results': [
+                serialize(group, fields, request)
+                for group in Group.objects.order_by('title')
+            ],
+        })
+
+
+class GroupDetailView(ApiView):
+    fields = GROUP_FIELDS
+
+    def get_version_keys(self):
+        return feed_keys(pages.groups_feed())
+
+    def get(self, request, *args, **kwargs):
+        return self.render(get_object_or_404(Group, slug=self.kwargs['slug']))
+
+
+class GroupPostsView(CursorListView):
+    fields = POST_FIELDS
+
+    def get_version_keys(self):
+        return feed_keys(
+            pages.group_feed(self.kwargs['slug']), pages.groups_feed()
+        )
+
+    def get_queryset(self):
+        group = get_object_or_404(Group, slug=self.kwargs['slug'])
+        return feeds.group_feed(group)
+
+
+class ProfileView(ApiView):
+    fields = PROFILE_FIELDS
+
+    def get_version_keys(self):
+        return feed_keys(pages.profile_feed(self.kwargs['username']))
+
+    def get(self, request, *args, **kwargs):
+        author = get_object_or_404(User, username=self.kwargs['username'])
+        author.stats = counters.user_stats(author)
+        return self.render(author)
+
+
+class ProfilePostsView(CursorListView):
+    fields = POST_FIELDS
+
+    def get_version_keys(self):
+        return feed_keys(
+            pages.profile_feed(self.kwargs['username']), pages.groups_feed()
+        )
+
+    def get_queryset(self):
+        author = get_object_or_404(User, username=self.kwargs['username'])
+        return feeds.profile_feed(author)
+
+
+class FollowFeedView(CursorListView):
+    """Posts of followed authors, validated by the body ETag only."""
+    fields = POST_FIELDS
+    public_methods = ()
+
+    def get_queryset(self):
+        return feeds.follow_feed(self.request.user)
+
+
+class FollowListView(ApiView):
+    public_methods = ()
+
+    def get(self, request, *args, **kwargs):
+        authors = User.objects.filter(
+            following__user=request.user
+        ).order_by('username').values_list('username', flat=True)
+        return JsonResponse({'results': list(authors)})
+
+    def post(self, request, *args, **kwargs):
+        author = get_object_or_404(
+            User, username=self.get_data().get('author')
+        )
+        if author == request.user:
+            raise BadRequest('Нельзя подписаться на себя')
+        _, created = Follow.objects.get_or_create(
+            user=request.user, author=author
+        )
+        return JsonResponse(
+            {'author': author.username}, status=201 if created else 200
+        )
+
+
+class FollowDetailView(ApiView):
+    public_methods = ()
+
+    def delete(self, request, *args, **kwargs):
+        author = get_object_or_404(User, username=self.kwargs['username'])
+        Follow.objects.filter(user=request.user, author=author).delete()
+        return HttpResponse(status=204)
+
+
+class TokenView(ApiView):
+    """Issues an API token for a username and password."""
+    public_methods = ('post',)
+
+    def post(self, request, *args, **kwargs):
+        data = self.get_data()
+        user = authenticate(
+            request,
+            username=data.get('username'),
+            password=data.get('password'),
+        )
+        if user is None:
+            return error('Неверное имя пользователя или пароль', 401)
+        return JsonResponse({'token': Token.objects.issue(user)}, status=201)
+
+    def delete(self, request, *args, **kwargs):
+        Token.objects.filter(user=request.user).delete()
+        return HttpResponse(status=204)
@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .database import configure_sqlite
+        from .identity import forget_deleted
+        connection_created.connect(configure_sqlite)
+        post_delete.connect(forget_deleted)
+        if settings.METRICS_ENABLED:
+            from .metrics import instrument_caches
+            instrument_caches()
@@ -0,0 +1,58 @@
+"""CACHES setting built from the environment.
+
+YATUBE_CACHE_BACKEND picks one backend for every named cache:
+
+* ``file`` (default) - FileBasedCache under YATUBE_CACHE_LOCATION, shared
+  by all worker processes on the host without any extra service;
+* ``db`` - DatabaseCache tables, create them with ``createcachetable``;
+* ``memcached`` - python-memcached servers from YATUBE_CACHE_LOCATION;
+* ``redis`` - django-redis server from YATUBE_CACHE_LOCATION;
+* ``locmem`` - per-process memory, used by the test runs.
+"""
+import os
+
+CACHE_NAMES = ('default', 'pages', 'fragments', 'thumbnails', 'sessions')
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'redis': 'django_redis.cache.RedisCache',
+}
+
+TIMEOUTS = {
+    'thumbnails': None,
+    'sessions': 60 * 60 * 24 * 14,
+}
+
+
+def _location(backend, location, name):
+    if backend == 'locmem':
+        return name
+    if backend == 'file':
+        return os.path.join(location, name)
+    if backend == 'db':
+        return f'cache_{name}'
+    return location.split(',')
+
+
+def build_caches(backend, location):
+    """Returns the CACHES setting with every name on the same backend."""
+    if backend not in BACKENDS:
+        raise ValueError(
+            f'Неизвестный кэш {backend}, доступны: {", ".join(BACKENDS)}'
+        )
+    caches = {}
+    for name in CACHE_NAMES:
+        config = {
+            'BACKEND': BACKENDS[backend],
+            'LOCATION': _location(backend, location, name),
+            'KEY_PREFIX': name,
+        }
+        if backend in ('locmem', 'file', 'db'):
+            config['OPTIONS'] = {'MAX_ENTRIES': 10000}
+        if name in TIMEOUTS:
+            config['TIMEOUT'] = TIMEOUTS[name]
+        caches[name] = config
+    return caches
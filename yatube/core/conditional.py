@@ -0,0 +1,111 @@
+"""Conditional GET for class-based views.
+
+A view tells its validators (an ETag source and a Last-Modified time)
+before doing any real work, usually through the generation counters
+of core.generations its content is versioned by. When the request
+carries matching If-None-Match or If-Modified-Since headers it gets
+304 Not Modified straight away; otherwise the validators are set on
+the full response.
+Views that cannot tell their validators in advance fall back to an ETag
+of the rendered body, which saves the transfer but not the rendering.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core import generations, routers
+
+
+def make_etag(*parts):
+    return hashlib.md5(
+        '|'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+
+
+def from_generations(generations):
+    """Last-Modified of content versioned by time based generations.
+
+    HTTP dates have whole seconds, so the newest generation is rounded up
+    and there is none while it falls within the current second: a later
+    change in the same second would keep the date and get 304.
+    """
+    if not generations:
+        return None
+    newest = max(generations) // 10 ** 9
+    if newest >= time.time_ns() // 10 ** 9:
+        return None
+    return datetime.fromtimestamp(newest + 1, tz=timezone.utc)
+
+
+class ConditionalGetMixin:
+    """Answers GET and HEAD with 304 when the validators still match."""
+
+    def get_version_keys(self):
+        """Generation keys the response depends on, None if unknown."""
+        return None
+
+    def get_version_parts(self):
+        """Other values the response depends on, e.g. aggregates."""
+        return ()
+
+    def get_validators(self):
+        """Returns (etag, last_modified), any of them may be None."""
+        keys = self.get_version_keys()
+        if keys is None:
+            return None, None
+        current = generations.get_many(keys)
+        versions = [current[key] for key in keys]
+        if not routers.settled(versions):
+            # A lagging replica may render the content before the change.
+            return None, None
+        parts = self.get_version_parts()
+        etag = make_etag(
+            self.request.get_full_path(),
+            self.request.user.pk or 'anon',
+            self.request.META.get('CSRF_COOKIE', ''),
+            *versions,
+            *parts
+        )
+        # Changes behind the extra parts do not move the generations.
+        return etag, None if parts else from_generations(versions)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        etag, last_modified = self.get_validators()
+        if etag is not None:
+            etag = quote_etag(etag)
+        timestamp = None
+        if last_modified is not None:
+            timestamp = int(last_modified.timestamp())
+        if etag is not None or timestamp is not None:
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is not None:
+                return response
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if etag is None and timestamp is None:
+            return self._finish_with_body_etag(request, response)
+        if etag is not None:
+            response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def _finish_with_body_etag(self, request, response):
+        if response.streaming:
+            return response
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        response['ETag'] = quote_etag(
+            hashlib.md5(response.content).hexdigest()
+        )
+        return get_conditional_response(
+            request, etag=response['ETag'], response=response
+        )
@@ -0,0 +1,116 @@
+"""SQLite connection tuning and a concurrency benchmark.
+
+Every new SQLite connection gets SQLITE_PRAGMAS: write-ahead logging so
+readers never wait for a writer, synchronous=NORMAL which is durable
+with WAL, a busy timeout so concurrent writers queue instead of failing
+with "database is locked", and larger page and mmap caches. Connections
+live CONN_MAX_AGE seconds, so the pragmas run once per worker thread
+rather than once per request.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+# Django's SQLite connections without tuning, for comparison in
+# benchmark(): rollback journal and the 5 second timeout of sqlite3.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': 5000,
+}
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver applying SQLITE_PRAGMAS."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
+
+
+def _worker(path, pragmas, deadline, work, counts, lock):
+    database = sqlite3.connect(
+        path,
+        timeout=pragmas.get('busy_timeout', 0) / 1000,
+        isolation_level=None,
+    )
+    apply_pragmas(database, pragmas)
+    done = failed = 0
+    while time.monotonic() < deadline:
+        try:
+            work(database)
+            done += 1
+        except sqlite3.OperationalError:
+            failed += 1
+    database.close()
+    with lock:
+        counts['done'] += done
+        counts['locked'] += failed
+
+
+def _read(database):
+    database.execute(
+        'SELECT id, text FROM post ORDER BY created DESC LIMIT 10'
+    ).fetchall()
+
+
+def _write(database):
+    database.execute(
+        "INSERT INTO post (text, created) VALUES ('text', julianday('now'))"
+    )
+
+
+def benchmark(pragmas, seconds=3, readers=4, writers=2, rows=10000):
+    """Reads and writes per second of concurrent threads on a fresh file.
+
+    Returns {'reads': ..., 'writes': ..., 'locked': ...}, locked counting
+    operations that failed with "database is locked".
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'benchmark.sqlite3')
+        database = sqlite3.connect(path, isolation_level=None)
+        apply_pragmas(database, pragmas)
+        database.execute(
+            'CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT, '
+            'created REAL)'
+        )
+        database.execute('CREATE INDEX post_created ON post (created)')
+        database.execute('BEGIN')
+        database.executemany(
+            'INSERT INTO post (text, created) VALUES (?, ?)',
+            (('text', number) for number in range(rows))
+        )
+        database.execute('COMMIT')
+        database.close()
+        lock = threading.Lock()
+        reads = {'done': 0, 'locked': 0}
+        writes = {'done': 0, 'locked': 0}
+        deadline = time.monotonic() + seconds
+        threads = [
+            threading.Thread(
+                target=_worker,
+                args=(path, pragmas, deadline, work, counts, lock)
+            )
+            for work, counts, amount in (
+                (_read, reads, readers), (_write, writes, writers)
+            )
+            for _ in range(amount)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return {
+        'reads': round(reads['done'] / seconds),
+        'writes': round(writes['done'] / seconds),
+        'locked': reads['locked'] + writes['locked'],
+    }
@@ -0,0 +1,32 @@
+"""Generation counters for version-keyed cache entries.
+
+Cached entries embed the generations of everything they depend on in
+their keys. Bumping a generation makes every such key unreachable, and
+the orphaned entries simply expire.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def new_generation():
+    # Time based, so a counter evicted from the cache never comes back
+    # with a value an old entry was stored under.
+    return time.time_ns()
+
+
+def bump(*keys):
+    generation = new_generation()
+    cache.set_many({key: generation for key in keys}, None)
+
+
+def get_many(keys):
+    """Generations of keys in one round trip, starting missing ones."""
+    generations = cache.get_many(keys)
+    missing = {
+        key: new_generation() for key in keys if key not in generations
+    }
+    if missing:
+        cache.set_many(missing, None)
+        generations.update(missing)
+    return generations
@@ -0,0 +1,109 @@
+"""Request-scoped identity map.
+
+Views look rows up by key through get() and get_object_or_404(), and
+each row is fetched at most once per request: later lookups of the same
+key return the same instance. Rows are kept per queryset shape, so an
+object loaded with deferred fields never stands in for a full one.
+Outside a request every lookup goes to the database.
+
+IdentityMapMiddleware scopes the map to the request and, with DEBUG on,
+reports the number of saved lookups in the X-Identity-Map-Hits header.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db.models import Model
+from django.http import Http404
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+
+
+class IdentityMap:
+    def __init__(self):
+        self.rows = {}
+        self.hits = 0
+
+    def key(self, queryset, field, value):
+        # The SQL tells the loaded columns, joins and filters apart.
+        return queryset.model._meta.label, field, str(value), str(
+            queryset.query
+        )
+
+    def get(self, queryset, field, value):
+        key = self.key(queryset, field, value)
+        if key in self.rows:
+            self.hits += 1
+            return self.rows[key]
+        obj = queryset.get(**{field: value})
+        self.rows[key] = obj
+        return obj
+
+    def forget(self, obj):
+        label = obj._meta.label
+        self.rows = {
+            key: row for key, row in self.rows.items()
+            if not (key[0] == label and row.pk == obj.pk)
+        }
+
+
+def current():
+    """The identity map of the current request, None outside requests."""
+    return getattr(_state, 'map', None)
+
+
+def _queryset(model_or_queryset):
+    if isinstance(model_or_queryset, type) and issubclass(
+        model_or_queryset, Model
+    ):
+        return model_or_queryset._default_manager.all()
+    return model_or_queryset
+
+
+def get(model_or_queryset, **lookup):
+    """Object by a single key lookup, e.g. get(User, username='leo')."""
+    queryset = _queryset(model_or_queryset)
+    (field, value), = lookup.items()
+    identity_map = current()
+    if identity_map is None:
+        return queryset.get(**lookup)
+    return identity_map.get(queryset, field, value)
+
+
+def get_object_or_404(model_or_queryset, **lookup):
+    queryset = _queryset(model_or_queryset)
+    try:
+        return get(queryset, **lookup)
+    except queryset.model.DoesNotExist:
+        raise Http404(
+            f'No {queryset.model._meta.object_name} matches the query.'
+        )
+
+
+def forget_deleted(sender, instance, **kwargs):
+    """post_delete receiver dropping deleted rows from the map."""
+    identity_map = current()
+    if identity_map is not None:
+        identity_map.forget(instance)
+
+
+class IdentityMapMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.map = identity_map = IdentityMap()
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.map = None
+        if identity_map.hits:
+            logger.debug(
+                'Identity map saved %d lookups on %s',
+                identity_map.hits, request.path
+            )
+            if settings.DEBUG:
+                response['X-Identity-Map-Hits'] = identity_map.hits
+        return response
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.database import DEFAULT_PRAGMAS, benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает чтения и записи в секунду конкурентных потоков '
+        'SQLite без настроек и с SQLITE_PRAGMAS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+
+    def handle(self, *args, **options):
+        for name, pragmas in (
+            ('default', DEFAULT_PRAGMAS), ('tuned', settings.SQLITE_PRAGMAS)
+        ):
+            result = benchmark(
+                pragmas,
+                seconds=options['seconds'],
+                readers=options['readers'],
+                writers=options['writers'],
+            )
+            self.stdout.write(
+                f'{name}: чтений/с {result["reads"]}, '
+                f'записей/с {result["writes"]}, '
+                f'ошибок блокировки {result["locked"]}'
+            )
@@ -0,0 +1,30 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sessions import CLEAR_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истёкшие сессии небольшими пачками, '
+        'запускайте периодически по cron'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=CLEAR_BATCH_SIZE,
+            help='Сколько сессий удалять за одну транзакцию'
+        )
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, 'get_model_class'):
+            self.stdout.write(
+                f'Хранилище {settings.SESSION_ENGINE} '
+                'удаляет истёкшие сессии само'
+            )
+            return
+        deleted = store.clear_expired(batch_size=options['batch_size'])
+        self.stdout.write(f'Удалено сессий: {deleted}')
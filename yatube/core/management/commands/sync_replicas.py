@@ -0,0 +1,29 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик, '
+        'заменяет репликацию при локальной проверке'
+    )
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError(
+                'Реплики других баз настраиваются на сервере базы данных'
+            )
+        primary = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        try:
+            for alias in settings.REPLICA_DATABASES:
+                replica = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    primary.backup(replica)
+                finally:
+                    replica.close()
+                self.stdout.write(f'{alias} обновлена')
+        finally:
+            primary.close()
@@ -0,0 +1,257 @@
+"""In-process request metrics in the Prometheus text format.
+
+MetricsMiddleware times every request and counts its database queries
+and template rendering per view; cache backends count hits and misses
+per cache. Numbers are aggregated in the memory of each worker process
+and served by core.views.metrics, so every worker is a separate scrape
+target. Requests over METRICS_QUERY_BUDGET queries or METRICS_TIME_BUDGET
+seconds are logged to the core.metrics logger.
+"""
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+
+
+class Registry:
+    """Metrics of one process, safe to update from several threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.query_seconds = defaultdict(float)
+        self.render_seconds = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.responses = defaultdict(int)
+        self.cache = defaultdict(int)
+
+    def observe_request(self, view, status, seconds, stats):
+        with self.lock:
+            self.latency[view].observe(seconds)
+            self.queries[view].observe(stats.queries)
+            self.query_seconds[view] += stats.query_seconds
+            if stats.render_seconds is not None:
+                self.render_seconds[view].observe(stats.render_seconds)
+            self.responses[view, status] += 1
+
+    def count_cache(self, cache, hits, misses):
+        with self.lock:
+            self.cache[cache, 'hit'] += hits
+            self.cache[cache, 'miss'] += misses
+
+    def render(self):
+        """Returns the metrics in the Prometheus text format."""
+        lines = []
+        with self.lock:
+            _histograms(
+                lines, 'yatube_request_duration_seconds',
+                'Время обработки запроса', 'view', self.latency
+            )
+            _counters(
+                lines, 'yatube_responses_total', 'Ответы по статусам',
+                ('view', 'status'), self.responses
+            )
+            _histograms(
+                lines, 'yatube_db_queries', 'Запросов к базе на запрос',
+                'view', self.queries
+            )
+            _counters(
+                lines, 'yatube_db_query_seconds_total',
+                'Время запросов к базе', ('view',),
+                {(view,): value for view, value in self.query_seconds.items()}
+            )
+            _histograms(
+                lines, 'yatube_template_render_seconds',
+                'Время отрисовки шаблона', 'view', self.render_seconds
+            )
+            _counters(
+                lines, 'yatube_cache_requests_total',
+                'Обращения к кэшу', ('cache', 'result'), self.cache
+            )
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items())
+    return ','.join(f'{name}="{_label(value)}"' for name, value in pairs)
+
+
+def _counters(lines, name, help_text, label_names, values):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} counter')
+    for key, value in sorted(values.items()):
+        lines.append(f'{name}{{{_labels(label_names, key)}}} {value}')
+
+
+def _histograms(lines, name, help_text, label_name, histograms):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for key, histogram in sorted(histograms.items()):
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            labels = _labels((label_name,), (key,), le=bound)
+            lines.append(f'{name}_bucket{{{labels}}} {count}')
+        labels = _labels((label_name,), (key,), le='+Inf')
+        lines.append(f'{name}_bucket{{{labels}}} {histogram.total}')
+        labels = _labels((label_name,), (key,))
+        lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+        lines.append(f'{name}_count{{{labels}}} {histogram.total}')
+
+
+registry = Registry()
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0
+        self.render_seconds = None
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Records latency, queries and template time of every request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        stats = request.metrics = RequestStats()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(stats.record_query)
+                )
+            response = self.get_response(request)
+        seconds = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unmatched'
+        registry.observe_request(view, response.status_code, seconds, stats)
+        self.check_budget(request, view, seconds, stats)
+        return response
+
+    def process_template_response(self, request, response):
+        stats = getattr(request, 'metrics', None)
+        if stats is None:
+            return response
+        started = time.perf_counter()
+
+        def rendered(response):
+            stats.render_seconds = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def check_budget(self, request, view, seconds, stats):
+        query_budget = settings.METRICS_QUERY_BUDGET
+        time_budget = settings.METRICS_TIME_BUDGET
+        if (
+            (query_budget is not None and stats.queries > query_budget)
+            or (time_budget is not None and seconds > time_budget)
+        ):
+            logger.warning(
+                'Over budget: %s %s (%s) took %.3f s, %d queries in %.3f s',
+                request.method, request.get_full_path(), view, seconds,
+                stats.queries, stats.query_seconds
+            )
+
+
+_counting = threading.local()
+
+
+def _counted(method, count):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # Backends implement get through get_many or the other way
+        # round, only the outermost call is counted.
+        if getattr(_counting, 'active', False):
+            return method(self, *args, **kwargs)
+        _counting.active = True
+        try:
+            return count(self, method, *args, **kwargs)
+        finally:
+            _counting.active = False
+    wrapper.counted = True
+    return wrapper
+
+
+_MISSING = object()
+
+
+def _count_get(cache, get, key, default=None, *args, **kwargs):
+    value = get(cache, key, _MISSING, *args, **kwargs)
+    hit = value is not _MISSING
+    registry.count_cache(
+        cache.key_prefix or 'default', int(hit), int(not hit)
+    )
+    return value if hit else default
+
+
+def _count_get_many(cache, get_many, keys, *args, **kwargs):
+    keys = list(keys)
+    values = get_many(cache, keys, *args, **kwargs)
+    registry.count_cache(
+        cache.key_prefix or 'default', len(values), len(keys) - len(values)
+    )
+    return values
+
+
+def instrument_caches():
+    """Counts hits and misses of every configured cache backend.
+
+    Caches are labelled by their KEY_PREFIX, which core.caches sets to
+    the cache name.
+    """
+    from django.core.cache import caches
+
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        for name, count in (
+            ('get', _count_get), ('get_many', _count_get_many)
+        ):
+            method = getattr(backend, name)
+            if not getattr(method, 'counted', False):
+                setattr(backend, name, _counted(method, count))
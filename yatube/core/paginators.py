@@ -0,0 +1,176 @@
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import F, Q
+from django.http import Http404
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+def encode_cursor(direction, value, pk):
+    """Packs direction and the (value, pk) key into an opaque token."""
+    if value is None:
+        value = ''
+    elif hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    raw = f'{direction}|{value}|{pk}'
+    return urlsafe_base64_encode(force_bytes(raw))
+
+
+def decode_cursor(token):
+    """Returns (direction, raw value, pk) stored in a cursor token."""
+    try:
+        direction, value, pk = force_str(
+            urlsafe_base64_decode(token)
+        ).split('|')
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise InvalidCursor('Неверный курсор')
+    if direction not in (NEXT, PREVIOUS):
+        raise InvalidCursor('Неверный курсор')
+    return direction, value, pk
+
+
+class CursorPaginator(Paginator):
+    """Keyset paginator over (field, pk), newest created first by default.
+
+    Every page is fetched with a single indexed range query of
+    per_page + 1 rows, so neither COUNT(*) nor OFFSET is ever issued.
+    The paginator only knows the neighbourhood of the page it served:
+    num_pages and page numbers describe that window, and the pages carry
+    next_cursor and previous_cursor tokens for the links.
+    Rows are ordered by field descending; a nullable field puts its
+    NULL rows last.
+    """
+    def __init__(self, object_list, per_page, field='created', **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.field = field
+        self.pk = object_list.model._meta.pk.attname
+        self.nullable = object_list.model._meta.get_field(field).null
+        self.object_list = object_list.order_by(
+            F(field).desc(nulls_last=True) if self.nullable
+            else f'-{field}',
+            f'-{self.pk}'
+        )
+        self._window = 1
+
+    @property
+    def num_pages(self):
+        return self._window
+
+    def page(self, cursor=None):
+        if not cursor:
+            return self._page_after(None)
+        direction, value, pk = decode_cursor(cursor)
+        key = self._parse_value(value), pk
+        if direction == NEXT:
+            return self._page_after(key)
+        return self._page_before(key)
+
+    def _parse_value(self, value):
+        if value == '' and self.nullable:
+            return None
+        field = self.object_list.model._meta.get_field(self.field)
+        try:
+            value = field.to_python(value)
+        except ValidationError:
+            raise InvalidCursor('Неверный курсор')
+        if value is None:
+            raise InvalidCursor('Неверный курсор')
+        return value
+
+    def _after(self, value, pk):
+        """Rows following the (value, pk) key in the descending order."""
+        if value is None:
+            return Q(**{f'{self.field}__isnull': True, f'{self.pk}__lt': pk})
+        after = (
+            Q(**{f'{self.field}__lt': value})
+            | Q(**{self.field: value, f'{self.pk}__lt': pk})
+        )
+        if self.nullable:
+            after |= Q(**{f'{self.field}__isnull': True})
+        return after
+
+    def _before(self, value, pk):
+        """Rows preceding the (value, pk) key in the descending order."""
+        if value is None:
+            return (
+                Q(**{f'{self.field}__isnull': False})
+                | Q(**{f'{self.field}__isnull': True, f'{self.pk}__gt': pk})
+            )
+        return (
+            Q(**{f'{self.field}__gt': value})
+            | Q(**{self.field: value, f'{self.pk}__gt': pk})
+        )
+
+    def _page_after(self, key):
+        queryset = self.object_list
+        if key is not None:
+            queryset = queryset.filter(self._after(*key))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return self._build_page(
+            rows,
+            has_next=has_more,
+            has_previous=key is not None and bool(rows),
+        )
+
+    def _page_before(self, key):
+        queryset = self.object_list.filter(self._before(*key)).order_by(
+            F(self.field).asc(nulls_first=True) if self.nullable
+            else self.field,
+            self.pk
+        )
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return self._build_page(
+            rows,
+            has_next=bool(rows),
+            has_previous=has_more,
+        )
+
+    def _build_page(self, rows, has_next, has_previous):
+        number = 2 if has_previous else 1
+        self._window = number + 1 if has_next else number
+        page = Page(rows, number, self)
+        page.cursor_based = True
+        page.next_cursor = page.previous_cursor = None
+        if has_next:
+            page.next_cursor = self._cursor(NEXT, rows[-1])
+        if has_previous:
+            page.previous_cursor = self._cursor(PREVIOUS, rows[0])
+        return page
+
+    def _cursor(self, direction, obj):
+        return encode_cursor(
+            direction, getattr(obj, self.field), getattr(obj, self.pk)
+        )
+
+
+class CursorPaginationMixin:
+    """ListView mixin: keyset pages by default, offset pages on ?page=."""
+    cursor_kwarg = 'cursor'
+    cursor_field = 'created'
+
+    def get_cursor_field(self):
+        return self.cursor_field
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(
+            queryset, page_size, field=self.get_cursor_field()
+        )
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
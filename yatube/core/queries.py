@@ -0,0 +1,167 @@
+"""Slow query log and N+1 detector.
+
+QueryLog hooks every database connection and records each query with
+its duration and origin: the template line being rendered or else the
+innermost line of project code. Queries are grouped by shape, the SQL
+with literals and IN lists collapsed, so the same lookup repeated for
+every object of a list shows up as one shape run many times.
+
+QueryLogMiddleware logs probable N+1s and slow queries of every request
+to the core.queries logger, tests use QueryLog directly or through
+posts.tests.utils.QueryBudgetMixin.
+"""
+import logging
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = settings.BASE_DIR + os.sep
+SKIPPED_FILES = (__file__,)
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LISTS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)')
+
+
+def shape(sql):
+    """SQL with literals and IN lists collapsed."""
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    return _LISTS.sub('(...)', sql)
+
+
+def origin():
+    """Template line being rendered or innermost line of project code."""
+    frame = sys._getframe(1)
+    code_line = None
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == 'render_annotated' and 'self' in frame.f_locals:
+            node = frame.f_locals['self']
+            template = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if template is not None and token is not None:
+                return f'{template.template_name}:{token.lineno}'
+        if (
+            code_line is None
+            and code.co_filename.startswith(PROJECT_DIR)
+            and code.co_filename not in SKIPPED_FILES
+            and f'{os.sep}site-packages{os.sep}' not in code.co_filename
+        ):
+            code_line = (
+                f'{os.path.relpath(code.co_filename, PROJECT_DIR)}'
+                f':{frame.f_lineno}'
+            )
+        frame = frame.f_back
+    return code_line or 'unknown'
+
+
+class Query:
+    def __init__(self, sql, seconds, origin):
+        self.sql = sql
+        self.seconds = seconds
+        self.origin = origin
+
+    @property
+    def shape(self):
+        return shape(self.sql)
+
+
+class QueryLog:
+    """Context manager recording the queries of every connection."""
+
+    def __init__(self, repeat_threshold=None, slow_threshold=None):
+        self.repeat_threshold = (
+            repeat_threshold or settings.QUERY_LOG_REPEAT_THRESHOLD
+        )
+        self.slow_threshold = (
+            slow_threshold if slow_threshold is not None
+            else settings.QUERY_LOG_SLOW_THRESHOLD
+        )
+        self.queries = []
+        self.stack = None
+
+    def __enter__(self):
+        self.stack = ExitStack()
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self.record))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+    def __len__(self):
+        return len(self.queries)
+
+    def record(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                Query(sql, time.perf_counter() - started, origin())
+            )
+
+    def repeated(self):
+        """[(shape, queries)] run at least repeat_threshold times."""
+        shapes = defaultdict(list)
+        for query in self.queries:
+            shapes[query.shape].append(query)
+        return [
+            (sql, queries) for sql, queries in shapes.items()
+            if len(queries) >= self.repeat_threshold
+        ]
+
+    def slow(self):
+        return [
+            query for query in self.queries
+            if query.seconds >= self.slow_threshold
+        ]
+
+    def report(self):
+        lines = [f'{len(self.queries)} queries:']
+        lines.extend(
+            f'  {query.seconds * 1000:.1f} ms {query.origin}: {query.sql}'
+            for query in self.queries
+        )
+        for sql, queries in self.repeated():
+            origins = sorted({query.origin for query in queries})
+            lines.append(
+                f'Probable N+1, {len(queries)} times from '
+                f'{", ".join(origins)}: {sql}'
+            )
+        return '\n'.join(lines)
+
+
+class QueryLogMiddleware:
+    """Logs probable N+1s and slow queries of each request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_LOG_ENABLED:
+            return self.get_response(request)
+        with QueryLog() as log:
+            response = self.get_response(request)
+        for sql, queries in log.repeated():
+            logger.warning(
+                'Probable N+1 on %s %s: %d times from %s: %s',
+                request.method, request.path, len(queries),
+                ', '.join(sorted({query.origin for query in queries})), sql
+            )
+        for query in log.slow():
+            logger.warning(
+                'Slow query on %s %s: %.1f ms from %s: %s',
+                request.method, request.path, query.seconds * 1000,
+                query.origin, query.sql
+            )
+        return response
@@ -0,0 +1,91 @@
+"""Read replicas with read-your-writes stickiness.
+
+YATUBE_DB_REPLICAS lists replica databases, for SQLite the paths of
+copies of the primary file kept fresh by the sync_replicas command.
+ReplicaRouter sends the reads of GET and HEAD requests to a random
+replica and everything else to the primary. A request that writes
+switches to the primary for the rest of it, and ReplicaMiddleware pins
+its client to the primary for REPLICA_LAG seconds with a cookie, so
+writers always see their own changes.
+
+Replicas may miss changes younger than REPLICA_LAG. Content versioned
+by generations bumped that recently is therefore neither cached nor
+given validators while it is read from a replica, see settled().
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+
+PIN_COOKIE = 'primary'
+
+_state = threading.local()
+
+
+def build_replicas(default, locations):
+    """Returns {alias: settings} of replicas of the default database."""
+    return {
+        f'replica{number}': {
+            **default, 'NAME': location, 'TEST': {'MIRROR': 'default'}
+        }
+        for number, location in enumerate(locations, 1)
+    }
+
+
+def reading_replicas():
+    return bool(settings.REPLICA_DATABASES) and getattr(
+        _state, 'replicas', False
+    )
+
+
+def settled(generations):
+    """Whether every replica has the changes behind the generations."""
+    if not reading_replicas():
+        return True
+    # Generations are the time_ns of their bump.
+    horizon = time.time_ns() - settings.REPLICA_LAG * 10 ** 9
+    return all(generation <= horizon for generation in generations)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_replicas():
+            return random.choice(settings.REPLICA_DATABASES)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        _state.replicas = False
+        _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaMiddleware:
+    """Reads safe requests from replicas unless the client is pinned."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.replicas = (
+            request.method in ('GET', 'HEAD')
+            and PIN_COOKIE not in request.COOKIES
+        )
+        _state.wrote = False
+        try:
+            response = self.get_response(request)
+        finally:
+            # Management commands and tasks always use the primary.
+            _state.replicas = False
+        if _state.wrote and settings.REPLICA_DATABASES:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_LAG, httponly=True
+            )
+        return response
@@ -0,0 +1,55 @@
+"""Session engines with batched cleanup of expired rows.
+
+YATUBE_SESSION_ENGINE picks where sessions live:
+
+* ``cached_db`` (default) - the sessions cache in front of the database,
+  page views read the cache and only logins and changes write a row;
+* ``cache`` - the sessions cache only, lost when the cache is flushed;
+* ``signed_cookies`` - the signed cookie itself, nothing on the server;
+* ``db`` - the django_session table only.
+
+Sessions are only written when modified, as SESSION_SAVE_EVERY_REQUEST
+is off. The db-backed engines delete expired rows in short batches, see
+the clean_sessions command.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+ENGINES = {
+    'cached_db': 'core.sessions.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'db': 'core.sessions.db',
+}
+CLEAR_BATCH_SIZE = 1000
+
+
+def session_engine(name):
+    """Returns the SESSION_ENGINE setting for the engine name."""
+    if name not in ENGINES:
+        raise ValueError(
+            f'Неизвестное хранилище сессий {name}, '
+            f'доступны: {", ".join(ENGINES)}'
+        )
+    return ENGINES[name]
+
+
+class BatchClearMixin:
+    @classmethod
+    def clear_expired(cls, batch_size=CLEAR_BATCH_SIZE):
+        """Deletes expired sessions in batches, returns their number."""
+        expired = cls.get_model_class().objects.filter(
+            expire_date__lt=timezone.now()
+        )
+        deleted = 0
+        while True:
+            # Short transactions keep the database free for requests.
+            with transaction.atomic():
+                keys = list(expired.values_list(
+                    'session_key', flat=True
+                )[:batch_size])
+                if not keys:
+                    return deleted
+                deleted += cls.get_model_class().objects.filter(
+                    session_key__in=keys
+                ).delete()[0]
@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import cached_db
+
+from . import BatchClearMixin
+
+
+class SessionStore(BatchClearMixin, cached_db.SessionStore):
+    pass
@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import db
+
+from . import BatchClearMixin
+
+
+class SessionStore(BatchClearMixin, db.SessionStore):
+    pass
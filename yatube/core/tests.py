@@ -0,0 +1,299 @@
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, override_settings
+)
+from django.urls import reverse
+
+from core import identity
+from core.caches import CACHE_NAMES, build_caches
+from core.database import benchmark
+from core.identity import IdentityMapMiddleware
+from core.metrics import registry
+from core.queries import QueryLog, shape
+from core.routers import (
+    PIN_COOKIE, ReplicaMiddleware, ReplicaRouter, settled
+)
+from core.sessions import session_engine
+from core.sessions.db import SessionStore
+from posts.models import Group, Post, User
+
+
+class CachesConfigTests(SimpleTestCase):
+    def test_every_name_on_chosen_backend(self):
+        """All named caches use the chosen backend"""
+        caches = build_caches('file', '/tmp/yatube')
+        self.assertEqual(set(caches), set(CACHE_NAMES))
+        for name, config in caches.items():
+            with self.subTest(name=name):
+                self.assertEqual(
+                    config['BACKEND'],
+                    'django.core.cache.backends.filebased.FileBasedCache'
+                )
+                self.assertEqual(config['LOCATION'], f'/tmp/yatube/{name}')
+
+    def test_db_backend_uses_tables(self):
+        """Database backend stores each name in its own table"""
+        caches = build_caches('db', '')
+        self.assertEqual(caches['pages']['LOCATION'], 'cache_pages')
+
+    def test_unknown_backend(self):
+        """Unknown backend is rejected"""
+        with self.assertRaises(ValueError):
+            build_caches('nope', '')
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_request_metrics(self):
+        """Latency, queries, templates and cache use are exposed"""
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        for line in (
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            'yatube_responses_total{view="posts:index",status="200"} 1',
+            'yatube_db_queries_count{view="posts:index"} 1',
+            'yatube_template_render_seconds_count{view="posts:index"} 1',
+            'yatube_cache_requests_total{cache="pages",result="miss"}',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, text)
+
+    @override_settings(INTERNAL_IPS=['127.0.0.1'], METRICS_TOKEN='secret')
+    def test_endpoint_needs_token(self):
+        """Without DEBUG even internal addresses need the bearer token"""
+        address = reverse('metrics')
+        self.assertEqual(self.client.get(address).status_code, 404)
+        response = self.client.get(
+            address, HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get(address).status_code, 200)
+
+    @override_settings(METRICS_QUERY_BUDGET=0)
+    def test_over_budget_logged(self):
+        """Requests over the query budget are logged"""
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('posts:index', logs.output[0])
+
+
+class QueryLogTests(TestCase):
+    def test_shape_collapses_literals(self):
+        """Queries differing in literals and list sizes share a shape"""
+        self.assertEqual(
+            shape("SELECT * FROM t WHERE id IN (%s, %s) AND x = 'a' LIMIT 2"),
+            shape('SELECT * FROM t WHERE id IN (%s) AND x = \'b\' LIMIT 10')
+        )
+
+    def test_repeated_queries_found(self):
+        """Lazy lookups in a loop are reported with their origin"""
+        group = Group.objects.create(title='group', slug='group')
+        for i in range(3):
+            Post.objects.create(
+                text='text',
+                author=User.objects.create_user(username=f'user{i}'),
+                group=group
+            )
+        with QueryLog() as log:
+            for post in Post.objects.all():
+                post.author.username
+        (sql, queries), = log.repeated()
+        self.assertEqual(len(queries), 3)
+        self.assertTrue(queries[0].origin.startswith('core/tests.py:'))
+        self.assertIn('Probable N+1, 3 times', log.report())
+
+    @override_settings(QUERY_LOG_ENABLED=True, QUERY_LOG_SLOW_THRESHOLD=0)
+    def test_middleware_logs_slow_queries(self):
+        """Middleware logs queries over the slow threshold"""
+        cache.clear()
+        with self.assertLogs('core.queries', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('Slow query on GET /', logs.output[0])
+
+
+class SessionTests(TestCase):
+    def test_unknown_engine(self):
+        """Unknown session engine is rejected"""
+        with self.assertRaises(ValueError):
+            session_engine('nope')
+
+    def test_page_views_do_not_touch_sessions(self):
+        """Authorized page views neither read nor write session rows"""
+        User.objects.create_user(username='reader', password='password')
+        self.client.login(username='reader', password='password')
+        with QueryLog() as log:
+            for name in ('posts:index', 'posts:follow_index'):
+                response = self.client.get(reverse(name))
+                self.assertNotIn(
+                    settings.SESSION_COOKIE_NAME, response.cookies
+                )
+        self.assertFalse(
+            [query for query in log.queries if 'django_session' in query.sql]
+        )
+
+    def test_nested_change_saved(self):
+        """In-place changes of nested values are saved"""
+        session = SessionStore()
+        session['cart'] = [1]
+        session.save()
+        session = SessionStore(session.session_key)
+        session['cart'].append(2)
+        session.modified = True
+        session.save()
+        self.assertEqual(SessionStore(session.session_key)['cart'], [1, 2])
+
+    def test_clean_sessions(self):
+        """Command deletes expired sessions only"""
+        for expiry in (-60, -60, 60):
+            session = SessionStore()
+            session.set_expiry(expiry)
+            session.save()
+        out = StringIO()
+        call_command('clean_sessions', batch_size=1, stdout=out)
+        self.assertIn('Удалено сессий: 2', out.getvalue())
+        self.assertEqual(Session.objects.count(), 1)
+
+
+class SqliteTuningTests(TestCase):
+    def test_pragmas_applied(self):
+        """New connections get SQLITE_PRAGMAS"""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout']
+            )
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_benchmark(self):
+        """Tuned file serves concurrent writers without lock errors"""
+        result = benchmark(
+            settings.SQLITE_PRAGMAS, seconds=0.2, readers=2, writers=2,
+            rows=100
+        )
+        self.assertGreater(result['writes'], 0)
+        self.assertEqual(result['locked'], 0)
+
+
+@override_settings(REPLICA_DATABASES=['replica1'], REPLICA_LAG=5)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+
+    def serve(self, request, view):
+        def get_response(request):
+            view()
+            return HttpResponse()
+
+        return ReplicaMiddleware(get_response)(request)
+
+    def test_safe_requests_read_replicas(self):
+        """GET reads go to a replica, writes and POST to the primary"""
+        used = []
+        self.serve(
+            self.factory.get('/'),
+            lambda: used.append(self.router.db_for_read(Post))
+        )
+        self.serve(
+            self.factory.post('/'),
+            lambda: used.append(self.router.db_for_read(Post))
+        )
+        self.assertEqual(used, ['replica1', 'default'])
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_writer_pinned_to_primary(self):
+        """After a write the client reads the primary for a while"""
+        used = []
+
+        def write_then_read():
+            used.append(self.router.db_for_write(Post))
+            used.append(self.router.db_for_read(Post))
+
+        response = self.serve(self.factory.get('/'), write_then_read)
+        self.assertEqual(used, ['default', 'default'])
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = cookie.value
+        self.serve(
+            request, lambda: used.append(self.router.db_for_read(Post))
+        )
+        self.assertEqual(used[-1], 'default')
+
+    def test_recent_changes_not_settled(self):
+        """Generations younger than the lag are unsettled on replicas"""
+        now = time.time_ns()
+        old = now - 60 * 10 ** 9
+        results = []
+        self.serve(self.factory.get('/'), lambda: results.extend([
+            settled([old]), settled([old, now])
+        ]))
+        self.assertEqual(results, [True, False])
+        self.assertTrue(settled([now]))
+
+
+class IdentityMapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+
+    def serve(self, view):
+        def get_response(request):
+            view()
+            return HttpResponse()
+
+        return IdentityMapMiddleware(get_response)(
+            RequestFactory().get('/')
+        )
+
+    @override_settings(DEBUG=True)
+    def test_row_loaded_once_per_request(self):
+        """Repeated lookups of a key return one object from one query"""
+        found = []
+
+        def view():
+            found.append(identity.get(User, username='auth'))
+            found.append(identity.get(User, username='auth'))
+            found.append(
+                identity.get(User.objects.only('pk'), pk=self.user.pk)
+            )
+
+        with QueryLog() as log:
+            response = self.serve(view)
+        self.assertIs(found[0], found[1])
+        self.assertEqual(len(log), 2)
+        self.assertEqual(response['X-Identity-Map-Hits'], '1')
+
+    def test_no_map_outside_requests(self):
+        """Lookups outside a request always query"""
+        with QueryLog() as log:
+            identity.get(User, username='auth')
+            identity.get(User, username='auth')
+        self.assertEqual(len(log), 2)
+
+    def test_deleted_rows_forgotten(self):
+        """Deleted rows are not served from the map"""
+        def view():
+            identity.get(User, username='auth').delete()
+            with self.assertRaises(Http404):
+                identity.get_object_or_404(User, username='auth')
+
+        self.serve(view)
@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from .metrics import registry
 
 
 def page_not_found(request, exception):
@@ -20,3 +25,22 @@ def server_error(request):
         'core/500.html',
         status=500
     )
+
+
+def metrics(request):
+    token = settings.METRICS_TOKEN
+    # Behind a proxy on the same host every request comes from an
+    # internal address, so addresses are only trusted in development.
+    allowed = (
+        settings.DEBUG
+        and request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+        or token and constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+        )
+    )
+    if not settings.METRICS_ENABLED or not allowed:
+        raise Http404
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
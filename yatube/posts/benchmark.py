@@ -0,0 +1,159 @@
+"""Latency and query benchmark of the feed and post pages.
+
+Every page is requested through the test client, so the numbers cover
+the whole stack from URL resolution to template rendering. For each
+page the report holds p50/p95 latency, queries per request and the
+table scans of its queries: full scans from EXPLAIN QUERY PLAN on
+SQLite, rows read from EXPLAIN ANALYZE on PostgreSQL.
+"""
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from .models import Follow, GroupStats, PostStats, UserStats
+
+METRICS = ('p50_ms', 'p95_ms', 'queries', 'full_scans', 'rows_scanned')
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def targets():
+    """Yields (name, address, viewer) of the busiest page of each kind."""
+    yield 'index', reverse('posts:index'), None
+    group = GroupStats.objects.select_related('group').order_by(
+        '-posts'
+    ).first()
+    if group is not None:
+        yield 'group', reverse(
+            'posts:group_list', kwargs={'slug': group.group.slug}
+        ), None
+    author = UserStats.objects.select_related('user').order_by(
+        '-posts'
+    ).first()
+    if author is not None:
+        yield 'profile', reverse(
+            'posts:profile', kwargs={'username': author.user.username}
+        ), None
+    reader = UserStats.objects.select_related('user').order_by(
+        '-following'
+    ).first()
+    if reader is not None and Follow.objects.filter(
+        user=reader.user
+    ).exists():
+        yield 'follow', reverse('posts:follow_index'), reader.user
+    post = PostStats.objects.order_by('-comments').first()
+    if post is not None:
+        yield 'post_detail', reverse(
+            'posts:post_detail', kwargs={'post_id': post.post_id}
+        ), None
+
+
+def _plan_rows(plan):
+    rows = 0
+    if 'Scan' in plan['Node Type']:
+        loops = plan.get('Actual Loops', 1)
+        rows += (
+            plan.get('Actual Rows', 0)
+            + plan.get('Rows Removed by Filter', 0)
+        ) * loops
+    for child in plan.get('Plans', ()):
+        rows += _plan_rows(child)
+    return rows
+
+
+def scans(queries):
+    """(full scans, rows scanned or None) of the (sql, params) pairs."""
+    full_scans = 0
+    rows = 0 if connection.vendor == 'postgresql' else None
+    with connection.cursor() as cursor:
+        for sql, params in queries:
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'EXPLAIN (ANALYZE, FORMAT JSON) {sql}', params
+                )
+                plan = cursor.fetchone()[0][0]['Plan']
+                rows += _plan_rows(plan)
+                full_scans += json.dumps(plan).count('"Seq Scan"')
+            elif connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                full_scans += sum(
+                    1 for row in cursor.fetchall()
+                    if row[-1].startswith('SCAN')
+                    and 'INDEX' not in row[-1]
+                )
+    return full_scans, rows
+
+
+def measure(address, viewer, requests, cold):
+    client = Client()
+    if viewer is not None:
+        client.force_login(viewer)
+    statements = []
+
+    def record(execute, sql, params, many, context):
+        statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    latencies = []
+    query_counts = []
+    sampled = None
+    client.get(address)
+    for _ in range(requests):
+        if cold:
+            for alias in settings.CACHES:
+                caches[alias].clear()
+        statements.clear()
+        with connection.execute_wrapper(record):
+            started = time.perf_counter()
+            response = client.get(address)
+            latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'{address}: {response.status_code}')
+        query_counts.append(len(statements))
+        if sampled is None or len(statements) > len(sampled):
+            sampled = list(statements)
+    full_scans, rows = scans(sampled or [])
+    return {
+        'p50_ms': round(percentile(latencies, 0.5), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'queries': round(sum(query_counts) / len(query_counts), 2),
+        'full_scans': full_scans,
+        'rows_scanned': rows,
+    }
+
+
+def run(requests=50, cold=False):
+    """Benchmarks every page, returns the report."""
+    return {
+        'database': connection.vendor,
+        'requests': requests,
+        'cold': cold,
+        'pages': {
+            name: measure(address, viewer, requests, cold)
+            for name, address, viewer in targets()
+        },
+    }
+
+
+def compare(report, baseline):
+    """Yields (page, metric, baseline value, value, change in %)."""
+    for name, metrics in report['pages'].items():
+        old = baseline.get('pages', {}).get(name)
+        if old is None:
+            continue
+        for metric in METRICS:
+            before, after = old.get(metric), metrics.get(metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before * 100 if before else None
+            yield name, metric, before, after, change
@@ -0,0 +1,42 @@
+"""Versions of cached post cards (posts/includes/post_list.html).
+
+A card fragment is cached under the post id and a version made of the
+post's and its author's generation counters. Saving the post, adding a
+comment or renaming the author moves a counter, so the next render
+misses and stale fragments simply expire.
+"""
+from core import generations, routers
+
+POST_KEY = 'posts:card:post:{}'
+AUTHOR_KEY = 'posts:card:author:{}'
+
+
+def bump_post(*post_ids):
+    generations.bump(*[POST_KEY.format(post_id) for post_id in post_ids])
+
+
+def bump_author(author_id):
+    generations.bump(AUTHOR_KEY.format(author_id))
+
+
+def attach_versions(posts):
+    """Sets card_version on every post with a single cache round trip.
+
+    Posts changed too recently for the replicas get no version and are
+    rendered uncached.
+    """
+    keys = {
+        post.pk: (POST_KEY.format(post.pk), AUTHOR_KEY.format(post.author_id))
+        for post in posts
+    }
+    current = generations.get_many(
+        [key for pair in keys.values() for key in pair]
+    )
+    for post in posts:
+        post_key, author_key = keys[post.pk]
+        versions = current[post_key], current[author_key]
+        post.card_version = (
+            '.'.join(map(str, versions)) if routers.settled(versions)
+            else None
+        )
+    return posts
@@ -0,0 +1,251 @@
+"""Denormalized counters of users, groups and posts.
+
+Counters live in the UserStats, GroupStats and PostStats tables and are
+moved by signals in the same transaction as the row that changed them.
+A missing stats row is rebuilt from the real tables on first use, the
+recount command rebuilds all of them and bulk loads rebuild the rows of
+what they touched with recount_users, recount_groups and recount_posts.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (Case, Count, DateTimeField, F, Max, Q, Value,
+                              When)
+
+from .models import (Comment, Follow, Group, GroupStats, Post, PostStats,
+                     User, UserStats)
+
+
+def count_user(user_id):
+    followers = Follow.objects.filter(author_id=user_id).count()
+    return {
+        'posts': Post.objects.filter(author_id=user_id).count(),
+        'followers': followers,
+        'following': Follow.objects.filter(user_id=user_id).count(),
+        'popular': followers > settings.TIMELINE_FANOUT_LIMIT,
+    }
+
+
+def count_group(group_id):
+    return Post.objects.filter(group_id=group_id).aggregate(
+        posts=Count('pk'),
+        authors=Count('author', distinct=True),
+        last_post=Max('created'),
+    )
+
+
+def count_post(post_id):
+    return {'comments': Comment.objects.filter(post_id=post_id).count()}
+
+
+STATS = {
+    UserStats: ('user_id', count_user),
+    GroupStats: ('group_id', count_group),
+    PostStats: ('post_id', count_post),
+}
+
+
+def get_stats(model, owner_id):
+    """Stats row of the owner, rebuilt from the real tables if missing."""
+    key, count = STATS[model]
+    stats = model.objects.filter(**{key: owner_id}).first()
+    if stats is None:
+        stats, _ = model.objects.get_or_create(
+            **{key: owner_id}, defaults=count(owner_id)
+        )
+    return stats
+
+
+def user_stats(user):
+    return get_stats(UserStats, user.pk)
+
+
+def group_stats(group):
+    return get_stats(GroupStats, group.pk)
+
+
+def post_stats(post):
+    return get_stats(PostStats, post.pk)
+
+
+def bump(model, owner_id, field, delta):
+    """Moves one counter by delta inside the current transaction."""
+    if owner_id is None:
+        return
+    key, _ = STATS[model]
+    rows = model.objects.filter(**{key: owner_id})
+    if delta < 0:
+        rows = rows.filter(**{f'{field}__gte': -delta})
+    with transaction.atomic():
+        updated = rows.update(**{field: F(field) + delta})
+        if not updated and delta > 0:
+            # The new row is already saved, so counting includes it.
+            get_stats(model, owner_id)
+
+
+def add_group_post(post):
+    """Counts a saved post into the stats of its group."""
+    if post.group_id is None:
+        return
+    new_author = not Post.objects.filter(
+        group_id=post.group_id, author_id=post.author_id
+    ).exclude(pk=post.pk).exists()
+    with transaction.atomic():
+        updated = GroupStats.objects.filter(group_id=post.group_id).update(
+            posts=F('posts') + 1,
+            authors=F('authors') + int(new_author),
+            last_post=Case(
+                When(
+                    Q(last_post__isnull=True)
+                    | Q(last_post__lt=post.created),
+                    then=Value(post.created, output_field=DateTimeField()),
+                ),
+                default=F('last_post'),
+            ),
+        )
+        if not updated:
+            get_stats(GroupStats, post.group_id)
+
+
+def remove_group_post(group_id, author_id):
+    """Counts a post out of the group it has already left."""
+    if group_id is None:
+        return
+    remaining = Post.objects.filter(group_id=group_id)
+    changes = {
+        'posts': F('posts') - 1,
+        'last_post': remaining.order_by('-created').values_list(
+            'created', flat=True
+        ).first(),
+    }
+    rows = GroupStats.objects.filter(group_id=group_id, posts__gte=1)
+    if not remaining.filter(author_id=author_id).exists():
+        changes['authors'] = F('authors') - 1
+        rows = rows.filter(authors__gte=1)
+    with transaction.atomic():
+        rows.update(**changes)
+
+
+def _grouped(queryset, key):
+    return dict(
+        queryset.values_list(key).annotate(total=Count('pk')).order_by()
+    )
+
+
+def _user_row(pk, posts, followers, following, popular):
+    return UserStats(
+        user_id=pk,
+        posts=posts.get(pk, 0),
+        followers=followers.get(pk, 0),
+        following=following.get(pk, 0),
+        # Popular authors stay popular, see posts.timeline.
+        popular=(
+            pk in popular
+            or followers.get(pk, 0) > settings.TIMELINE_FANOUT_LIMIT
+        ),
+    )
+
+
+def _group_row(pk, group_posts):
+    stats = group_posts.get(pk, {})
+    return GroupStats(
+        group_id=pk,
+        posts=stats.get('total', 0),
+        authors=stats.get('authors', 0),
+        last_post=stats.get('last'),
+    )
+
+
+def _group_posts(posts):
+    return {
+        row['group']: row
+        for row in posts.exclude(group=None).values('group').annotate(
+            total=Count('pk'),
+            authors=Count('author', distinct=True),
+            last=Max('created'),
+        ).order_by()
+    }
+
+
+def _popular_ids(stats):
+    return set(stats.filter(popular=True).values_list('user_id', flat=True))
+
+
+def _rewrite(model, key, ids, rows):
+    with transaction.atomic():
+        model.objects.filter(**{f'{key}__in': ids}).delete()
+        model.objects.bulk_create(rows)
+
+
+def _id_batches(ids, batch_size):
+    ids = sorted(set(ids) - {None})
+    for start in range(0, len(ids), batch_size):
+        yield ids[start:start + batch_size]
+
+
+def recount_users(user_ids, batch_size=500):
+    """Rebuilds the stats rows of the users, batch_size at a time."""
+    for batch in _id_batches(user_ids, batch_size):
+        posts = _grouped(Post.objects.filter(author__in=batch), 'author')
+        followers = _grouped(
+            Follow.objects.filter(author__in=batch).exclude(user=None),
+            'author'
+        )
+        following = _grouped(
+            Follow.objects.filter(user__in=batch).exclude(author=None),
+            'user'
+        )
+        popular = _popular_ids(UserStats.objects.filter(user__in=batch))
+        _rewrite(UserStats, 'user_id', batch, [
+            _user_row(pk, posts, followers, following, popular)
+            for pk in batch
+        ])
+
+
+def recount_groups(group_ids, batch_size=500):
+    """Rebuilds the stats rows of the groups, batch_size at a time."""
+    for batch in _id_batches(group_ids, batch_size):
+        group_posts = _group_posts(Post.objects.filter(group__in=batch))
+        _rewrite(GroupStats, 'group_id', batch, [
+            _group_row(pk, group_posts) for pk in batch
+        ])
+
+
+def recount_posts(post_ids, batch_size=500):
+    """Rebuilds the stats rows of the posts, batch_size at a time."""
+    for batch in _id_batches(post_ids, batch_size):
+        comments = _grouped(Comment.objects.filter(post__in=batch), 'post')
+        _rewrite(PostStats, 'post_id', batch, [
+            PostStats(post_id=pk, comments=comments.get(pk, 0))
+            for pk in batch
+        ])
+
+
+def recount():
+    """Rebuilds every stats row. Returns the number of rows written."""
+    posts = _grouped(Post.objects.all(), 'author')
+    followers = _grouped(Follow.objects.exclude(user=None), 'author')
+    following = _grouped(Follow.objects.exclude(author=None), 'user')
+    group_posts = _group_posts(Post.objects.all())
+    comments = _grouped(Comment.objects.all(), 'post')
+    popular = _popular_ids(UserStats.objects.all())
+    user_rows = [
+        _user_row(pk, posts, followers, following, popular)
+        for pk in User.objects.values_list('pk', flat=True).iterator()
+    ]
+    group_rows = [
+        _group_row(pk, group_posts)
+        for pk in Group.objects.values_list('pk', flat=True).iterator()
+    ]
+    post_rows = [
+        PostStats(post_id=pk, comments=total)
+        for pk, total in comments.items()
+    ]
+    with transaction.atomic():
+        for model, rows in (
+            (UserStats, user_rows),
+            (GroupStats, group_rows),
+            (PostStats, post_rows),
+        ):
+            model.objects.all().delete()
+            model.objects.bulk_create(rows, batch_size=500)
+    return len(user_rows) + len(group_rows) + len(post_rows)
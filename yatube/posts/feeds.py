@@ -0,0 +1,60 @@
+"""Querysets every post feed is built from.
+
+Post cards (posts/includes/post_list.html) show the author name and
+profile link, the group link, the date, the image, the text and the
+comment counter, so the author, group and stats rows are joined in and
+all other columns are deferred.
+"""
+from . import timeline
+from .models import Comment, Post
+
+CARD_FIELDS = (
+    'text',
+    'created',
+    'image',
+    'author',
+    'group',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group__title',
+    'group__slug',
+    'stats__comments',
+)
+
+
+def posts():
+    """Base queryset of post cards."""
+    return Post.objects.select_related(
+        'author', 'group', 'stats'
+    ).only(*CARD_FIELDS)
+
+
+def index_feed():
+    return posts()
+
+
+def group_feed(group):
+    return posts().filter(group=group)
+
+
+def profile_feed(author):
+    return posts().filter(author=author)
+
+
+def trending_feed():
+    """Scored posts, best first, see posts.trending."""
+    return posts().filter(score__isnull=False).order_by(
+        '-score__score', '-pk'
+    )
+
+
+def follow_feed(user):
+    return posts().filter(timeline.feed_filter(user))
+
+
+def comments(post):
+    """Comments of the post with their authors joined in."""
+    return Comment.objects.select_related('author').only(
+        'text', 'created', 'post', 'author', 'author__username'
+    ).filter(post=post)
@@ -0,0 +1,53 @@
+"""Normalization of uploaded post images.
+
+Uploads are rotated by their EXIF orientation, shrunk to fit
+POST_IMAGE_MAX_SIZE and re-encoded without metadata at
+POST_IMAGE_QUALITY, optionally to POST_IMAGE_FORMAT (e.g. WEBP).
+Animated images are stored as uploaded.
+"""
+import hashlib
+import os
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+EXTENSIONS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'GIF': 'gif',
+    'WEBP': 'webp',
+}
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def normalize(data):
+    """Returns (bytes, format) of the normalized image."""
+    image = Image.open(BytesIO(data))
+    source_format = image.format
+    if getattr(image, 'is_animated', False):
+        return data, source_format
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(settings.POST_IMAGE_MAX_SIZE)
+    target_format = settings.POST_IMAGE_FORMAT or source_format
+    if target_format not in EXTENSIONS:
+        target_format = 'JPEG'
+    options = {}
+    if target_format in ('JPEG', 'WEBP'):
+        options['quality'] = settings.POST_IMAGE_QUALITY
+    if target_format in ('JPEG', 'PNG'):
+        options['optimize'] = True
+    if target_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    output = BytesIO()
+    image.save(output, format=target_format, **options)
+    return output.getvalue(), target_format
+
+
+def file_name(name, image_format):
+    """Upload name with the extension of the stored format."""
+    stem, _ = os.path.splitext(os.path.basename(name))
+    return f'{stem}.{EXTENSIONS[image_format]}'
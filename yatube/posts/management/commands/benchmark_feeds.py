@@ -0,0 +1,50 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку, число запросов и сканирования таблиц '
+        'на страницах лент и поста'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать все кэши перед каждым запросом'
+        )
+        parser.add_argument('--output', help='Сохранить отчёт в JSON')
+        parser.add_argument(
+            '--compare', help='Сравнить с сохранённым отчётом'
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as stream:
+                    baseline = json.load(stream)
+            except (OSError, ValueError) as error:
+                raise CommandError(error)
+        report = benchmark.run(options['requests'], options['cold'])
+        for name, metrics in report['pages'].items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for metric in benchmark.METRICS:
+                self.stdout.write(f'  {metric}: {metrics[metric]}')
+        if baseline is not None:
+            self.stdout.write(self.style.MIGRATE_HEADING('Сравнение'))
+            for name, metric, before, after, change in benchmark.compare(
+                report, baseline
+            ):
+                change = f'{change:+.1f}%' if change is not None else '-'
+                self.stdout.write(
+                    f'  {name} {metric}: {before} -> {after} ({change})'
+                )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump(report, stream, indent=2)
+            self.stdout.write(f'Отчёт сохранён в {options["output"]}')
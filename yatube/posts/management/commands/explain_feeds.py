@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts import feeds
+from posts.models import Comment, Follow, Group, Post, User
+
+FEED_ORDERING = ('-created', '-pk')
+
+
+class Command(BaseCommand):
+    help = 'Печатает план выполнения запросов лент постов'
+
+    def feed_queries(self):
+        """Yields (name, queryset) for every feed the site serves."""
+        yield 'index', feeds.index_feed().order_by(*FEED_ORDERING)
+        group = Group.objects.first()
+        if group is not None:
+            yield (
+                f'group {group.slug}',
+                feeds.group_feed(group).order_by(*FEED_ORDERING)
+            )
+        author = User.objects.filter(posts__isnull=False).first()
+        if author is not None:
+            yield (
+                f'profile {author.username}',
+                feeds.profile_feed(author).order_by(*FEED_ORDERING)
+            )
+        follow = Follow.objects.exclude(user=None).first()
+        if follow is not None:
+            yield (
+                f'follow {follow.user.username}',
+                feeds.follow_feed(follow.user).order_by(*FEED_ORDERING)
+            )
+            yield (
+                f'followers {follow.author.username}',
+                Follow.objects.filter(author=follow.author).values('user')
+            )
+        post = Post.objects.first()
+        if post is not None:
+            yield (
+                f'comments {post.pk}',
+                Comment.objects.filter(post=post).order_by(*FEED_ORDERING)
+            )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Database: {connection.vendor}')
+        for name, queryset in self.feed_queries():
+            queryset = queryset[:settings.POSTS_AMOUNT + 1]
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain())
+            self.stdout.write('')
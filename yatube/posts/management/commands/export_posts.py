@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в JSON Lines или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл выгрузки, "-" для стандартного вывода'
+        )
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, default='jsonl'
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        started = time.monotonic()
+        records = transfer.export_records(options['batch_size'])
+        total = 0
+
+        def counted(records):
+            nonlocal total
+            for record in records:
+                total += 1
+                yield record
+
+        write = transfer.WRITERS[options['format']]
+        if path == '-':
+            write(counted(records), self.stdout)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                write(counted(records), stream)
+        elapsed = time.monotonic() - started
+        # The dump itself may be on stdout.
+        report = self.stderr if path == '-' else self.stdout
+        report.write(
+            f'Выгружено постов: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-6):.0f} в секунду)'
+        )
@@ -0,0 +1,55 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Загружает посты из JSON Lines или CSV пакетами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл выгрузки, "-" для стандартного ввода'
+        )
+        parser.add_argument(
+            '--format',
+            choices=transfer.FORMATS,
+            help='По умолчанию определяется по расширению файла'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        data_format = options['format']
+        if data_format is None:
+            data_format = 'csv' if path.endswith('.csv') else 'jsonl'
+        started = time.monotonic()
+
+        def progress(total):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'Загружено постов: {total} '
+                f'({total / max(elapsed, 1e-6):.0f} в секунду)'
+            )
+
+        read = transfer.READERS[data_format]
+        try:
+            if path == '-':
+                result = transfer.import_records(
+                    read(sys.stdin), options['batch_size'], progress
+                )
+            else:
+                with open(path, encoding='utf-8', newline='') as stream:
+                    result = transfer.import_records(
+                        read(stream), options['batch_size'], progress
+                    )
+        except (OSError, transfer.RecordError) as error:
+            raise CommandError(error)
+        total, authors, groups = result
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Готово: {total} постов за {elapsed:.1f} с, '
+            f'новых авторов: {authors}, новых групп: {groups}'
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для всех картинок постов'
+
+    def handle(self, *args, **options):
+        images = Post.objects.exclude(image='').values_list(
+            'image', flat=True
+        ).order_by().distinct().iterator()
+        total = 0
+        for image_name in images:
+            thumbnails.pregenerate(image_name)
+            total += 1
+        self.stdout.write(f'Обработано картинок: {total}')
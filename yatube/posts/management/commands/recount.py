@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписчиков'
+
+    def handle(self, *args, **options):
+        rows = counters.recount()
+        self.stdout.write(f'Пересчитано строк: {rows}')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import TimelineEntry, User
+
+
+class Command(BaseCommand):
+    help = 'Обрезает ленты подписок до TIMELINE_LENGTH записей'
+
+    def handle(self, *args, **options):
+        deleted = 0
+        users = User.objects.filter(
+            pk__in=TimelineEntry.objects.values('user')
+        ).iterator()
+        for user in users:
+            deleted += timeline.trim(user)
+        self.stdout.write(f'Удалено записей: {deleted}')
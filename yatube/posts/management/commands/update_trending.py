@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг популярных постов, '
+        'запускайте периодически по cron'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TRENDING_BATCH_SIZE,
+            help='Сколько постов оценивать за раз'
+        )
+
+    def handle(self, *args, **options):
+        rows = trending.recompute(batch_size=options['batch_size'])
+        self.stdout.write(f'Оценено постов: {rows}')
@@ -0,0 +1,74 @@
+from django.db import migrations
+
+SQLITE_TABLE = (
+    'CREATE VIRTUAL TABLE posts_search USING fts5('
+    'body, post_id UNINDEXED, kind UNINDEXED, object_id UNINDEXED, '
+    "tokenize='unicode61')"
+)
+POSTGRES_TABLE = (
+    'CREATE TABLE posts_search ('
+    'id serial PRIMARY KEY, body text NOT NULL, post_id integer NOT NULL, '
+    'kind varchar(10) NOT NULL, object_id integer NOT NULL, '
+    'document tsvector NOT NULL)',
+    'CREATE INDEX posts_search_document_idx ON posts_search '
+    'USING GIN (document)',
+    'CREATE INDEX posts_search_object_idx ON posts_search (kind, object_id)',
+    'CREATE INDEX posts_search_post_idx ON posts_search (post_id)',
+)
+
+
+def create_search_table(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_TABLE)
+    elif vendor == 'postgresql':
+        for statement in POSTGRES_TABLE:
+            schema_editor.execute(statement)
+    else:
+        return
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    documents = []
+    posts = Post.objects.select_related('author', 'group').iterator()
+    for post in posts:
+        parts = [
+            post.text,
+            f'{post.author.first_name} {post.author.last_name}'.strip(),
+            post.author.username,
+        ]
+        if post.group_id:
+            parts.append(post.group.title)
+        documents.append(('\n'.join(parts), post.pk, 'post', post.pk))
+    for comment in Comment.objects.iterator():
+        documents.append((comment.text, comment.post_id, 'comment', comment.pk))
+    with schema_editor.connection.cursor() as cursor:
+        for body, post_id, kind, object_id in documents:
+            if vendor == 'postgresql':
+                cursor.execute(
+                    'INSERT INTO posts_search (body, post_id, kind, '
+                    'object_id, document) VALUES (%s, %s, %s, %s, '
+                    "to_tsvector('russian', %s))",
+                    [body, post_id, kind, object_id, body]
+                )
+            else:
+                cursor.execute(
+                    'INSERT INTO posts_search (body, post_id, kind, '
+                    'object_id) VALUES (%s, %s, %s, %s)',
+                    [body, post_id, kind, object_id]
+                )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0028_post_image_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
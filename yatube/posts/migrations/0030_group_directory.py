@@ -0,0 +1,61 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:20
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    Post = apps.get_model('posts', 'Post')
+    totals = {
+        row['group']: row
+        for row in Post.objects.exclude(group=None).values('group').annotate(
+            total=Count('pk'),
+            authors=Count('author', distinct=True),
+            last=Max('created'),
+        ).order_by()
+    }
+    GroupStats.objects.all().delete()
+    GroupStats.objects.bulk_create([
+        GroupStats(
+            group_id=pk,
+            posts=totals.get(pk, {}).get('total', 0),
+            authors=totals.get(pk, {}).get('authors', 0),
+            last_post=totals.get(pk, {}).get('last'),
+        )
+        for pk in Group.objects.values_list('pk', flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0029_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupstats',
+            name='authors',
+            field=models.PositiveIntegerField(default=0, verbose_name='Авторов'),
+        ),
+        migrations.AddField(
+            model_name='groupstats',
+            name='last_post',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний пост'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-posts', '-group'], name='groupstats_posts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-last_post', '-group'], name='groupstats_last_post_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', 'author'], name='post_group_author_idx'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+STATEMENTS = (
+    'CREATE VIRTUAL TABLE posts_search_keyed USING fts5('
+    'body, post_id UNINDEXED, kind UNINDEXED, object_id UNINDEXED, '
+    "tokenize='unicode61')",
+    'INSERT INTO posts_search_keyed (rowid, body, post_id, kind, object_id) '
+    "SELECT object_id * 2 + (kind = 'comment'), body, post_id, kind, "
+    'object_id FROM posts_search',
+    'DROP TABLE posts_search',
+    'ALTER TABLE posts_search_keyed RENAME TO posts_search',
+)
+
+
+def key_search_rows(apps, schema_editor):
+    # posts.search deletes SQLite documents by rowid, see search.rowid.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in STATEMENTS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0031_trending'),
+    ]
+
+    operations = [
+        migrations.RunPython(key_search_rows, migrations.RunPython.noop),
+    ]
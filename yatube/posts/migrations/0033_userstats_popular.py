@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def flag_popular_authors(apps, schema_editor):
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.filter(
+        followers__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).update(popular=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0032_search_rowids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='popular',
+            field=models.BooleanField(default=False, help_text='Посты читаются в ленту подписок на лету, см. timeline', verbose_name='Популярный'),
+        ),
+        migrations.RunPython(flag_popular_authors, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,11 @@
 from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
 from django.db import models
 
 from core.models import CreatedModel
 
+from . import images
+
 User = get_user_model()
 
 
@@ -33,13 +36,60 @@ class Post(CreatedModel):
         blank=True,
         help_text='Picture'
     )
+    image_hash = models.CharField(
+        'Хеш картинки',
+        max_length=64,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text='SHA-256 загруженного файла'
+    )
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=('-created', '-id'),
+                name='post_created_idx'
+            ),
+            models.Index(
+                fields=('author', '-created', '-id'),
+                name='post_author_created_idx'
+            ),
+            models.Index(
+                fields=('group', '-created', '-id'),
+                name='post_group_created_idx'
+            ),
+            models.Index(
+                fields=('group', 'author'),
+                name='post_group_author_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        if self.image and not self.image._committed:
+            self.ingest_image()
+        super().save(*args, **kwargs)
+
+    def ingest_image(self):
+        """Normalizes a new upload or reuses an identical stored one."""
+        self.image.seek(0)
+        data = self.image.read()
+        self.image_hash = images.content_hash(data)
+        stored = Post.objects.filter(
+            image_hash=self.image_hash
+        ).exclude(image='').values_list('image', flat=True).first()
+        if stored:
+            self.image = stored
+            return
+        data, image_format = images.normalize(data)
+        self.image = ContentFile(
+            data, name=images.file_name(self.image.name, image_format)
+        )
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -73,6 +123,12 @@ class Comment(CreatedModel):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=('post', '-created', '-id'),
+                name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -103,6 +159,146 @@ class Follow(models.Model):
                 name='unique follow'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('author', 'user'),
+                name='follow_author_user_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.author.username}'
+
+
+class TimelineEntry(models.Model):
+    """Post id pushed into a follower's precomputed home timeline."""
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        verbose_name='Читатель',
+        on_delete=models.CASCADE,
+        help_text='Читатель'
+    )
+    post = models.ForeignKey(
+        'Post',
+        related_name='timeline_entries',
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        help_text='Пост'
+    )
+    created = models.DateTimeField(
+        'Дата публикации',
+        help_text='Дата публикации поста'
+    )
+
+    class Meta:
+        ordering = ('-created',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique timeline entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-created'),
+                name='timeline_user_created_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.post_id}'
+
+
+class UserStats(models.Model):
+    """Denormalized counters of a user, see posts.counters."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        help_text='Пользователь'
+    )
+    posts = models.PositiveIntegerField('Постов', default=0)
+    followers = models.PositiveIntegerField('Подписчиков', default=0)
+    following = models.PositiveIntegerField('Подписок', default=0)
+    popular = models.BooleanField(
+        'Популярный',
+        default=False,
+        help_text='Посты читаются в ленту подписок на лету, см. timeline'
+    )
+
+    def __str__(self):
+        return f'{self.user_id}: {self.posts}/{self.followers}'
+
+
+class GroupStats(models.Model):
+    """Denormalized counters of a group, see posts.counters."""
+    group = models.OneToOneField(
+        'Group',
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа',
+        on_delete=models.CASCADE,
+        help_text='Группа'
+    )
+    posts = models.PositiveIntegerField('Постов', default=0)
+    authors = models.PositiveIntegerField('Авторов', default=0)
+    last_post = models.DateTimeField('Последний пост', null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=('-posts', '-group'),
+                name='groupstats_posts_idx'
+            ),
+            models.Index(
+                fields=('-last_post', '-group'),
+                name='groupstats_last_post_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.group_id}: {self.posts}'
+
+
+class PostStats(models.Model):
+    """Denormalized counters of a post, see posts.counters."""
+    post = models.OneToOneField(
+        'Post',
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        help_text='Пост'
+    )
+    comments = models.PositiveIntegerField('Комментариев', default=0)
+
+    def __str__(self):
+        return f'{self.post_id}: {self.comments}'
+
+
+class PostScore(models.Model):
+    """Trending score of a post, see posts.trending."""
+    post = models.OneToOneField(
+        'Post',
+        primary_key=True,
+        related_name='score',
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        help_text='Пост'
+    )
+    score = models.FloatField('Рейтинг')
+    computed = models.DateTimeField('Рассчитан')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=('-score', '-post'),
+                name='postscore_score_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score}'
@@ -0,0 +1,91 @@
+"""Whole-page cache of the index, group and profile feeds.
+
+A page is stored under its full path, the viewer variant (anonymous or
+a particular user) and the generations of the feeds it shows. Creating,
+editing or deleting a post bumps the feeds it belongs to, so pages may
+live for hours and still never outlive their content.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core import generations, routers
+
+from . import follows
+
+FEED_KEY = 'posts:feed:{}'
+PAGE_KEY = 'posts:page:{variant}:{path}:{version}'
+
+
+def index_feed():
+    return 'index'
+
+
+def group_feed(slug):
+    return f'group:{slug}'
+
+
+def profile_feed(username):
+    return f'profile:{username}'
+
+
+def groups_feed():
+    return 'groups'
+
+
+def trending_feed():
+    return 'trending'
+
+
+def bump(*feeds):
+    generations.bump(*[FEED_KEY.format(feed) for feed in feeds])
+
+
+def page_key(request, feeds):
+    """Cache key of the page, None while replicas may lag behind it."""
+    keys = [FEED_KEY.format(feed) for feed in feeds]
+    if request.user.is_authenticated:
+        # Pages show follow buttons of the viewer.
+        keys.append(follows.follows_key(request.user))
+    current = generations.get_many(keys)
+    if not routers.settled(current.values()):
+        return None
+    variant = 'anon'
+    if request.user.is_authenticated:
+        variant = f'user{request.user.pk}'
+    return PAGE_KEY.format(
+        variant=variant,
+        path=hashlib.md5(request.get_full_path().encode()).hexdigest(),
+        version='.'.join(str(current[key]) for key in keys),
+    )
+
+
+class FeedPageCacheMixin:
+    """Serves GET requests of a feed view from the version-keyed cache."""
+
+    def get_feeds(self):
+        """Names of the feeds the page shows."""
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET':
+            return super().dispatch(request, *args, **kwargs)
+        key = page_key(request, self.get_feeds())
+        if key is None:
+            return super().dispatch(request, *args, **kwargs)
+        cache = caches['pages']
+        response = cache.get(key)
+        if response is not None:
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and not response.cookies:
+            if hasattr(response, 'render') and callable(response.render):
+                response.add_post_render_callback(
+                    lambda rendered: cache.set(
+                        key, rendered, settings.FEED_PAGE_TIMEOUT
+                    )
+                )
+            else:
+                cache.set(key, response, settings.FEED_PAGE_TIMEOUT)
+        return response
@@ -0,0 +1,241 @@
+"""Full-text search over posts, comments, group titles and author names.
+
+Every post and comment has a document in the posts_search table: FTS5 on
+SQLite, a tsvector column with a GIN index on PostgreSQL (both created
+by migration 0029); other databases fall back to a LIKE scan of post
+texts. FTS5 documents are keyed by a rowid derived from their kind and
+object id, the only column it can look rows up by. Signals keep
+documents in sync. A search returns post ids ranked by their best
+matching document, and pages through them with (rank, post id) cursors.
+"""
+import re
+
+from django.db import connection, transaction
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from core.paginators import InvalidCursor
+
+POST = 'post'
+COMMENT = 'comment'
+
+WORD = re.compile(r'\w+')
+
+
+# Rows per INSERT, within SQLite's 999 variables per statement.
+INSERT_ROWS = 200
+
+
+def _words(query):
+    return WORD.findall(query.lower())[:10]
+
+
+def _insert(cursor, sql, values, rows):
+    """Inserts rows with multi-row VALUES.
+
+    Unlike executemany, this keeps working under the debug toolbar,
+    which cannot format executemany parameters on SQLite.
+    """
+    for start in range(0, len(rows), INSERT_ROWS):
+        chunk = rows[start:start + INSERT_ROWS]
+        cursor.execute(
+            sql + ', '.join([values] * len(chunk)),
+            [param for row in chunk for param in row]
+        )
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def rowid(kind, object_id):
+    """SQLite rowid of a document: FTS5 only indexes the rowid."""
+    return object_id * 2 + (kind == COMMENT)
+
+
+class SQLiteBackend:
+    def delete(self, cursor, kind, ids):
+        rowids = [rowid(kind, pk) for pk in ids]
+        cursor.execute(
+            'DELETE FROM posts_search '
+            f'WHERE rowid IN ({_placeholders(rowids)})',
+            rowids
+        )
+
+    def delete_post(self, cursor, post_id):
+        # Comment documents go with the comments, deleted first.
+        self.delete(cursor, POST, [post_id])
+
+    def insert(self, cursor, rows):
+        _insert(
+            cursor,
+            'INSERT INTO posts_search '
+            '(rowid, body, post_id, kind, object_id) VALUES ',
+            '(%s, %s, %s, %s, %s)',
+            [(rowid(row[2], row[3]), *row) for row in rows]
+        )
+
+    def match(self, cursor, words, after, limit):
+        expression = ' '.join(f'"{word}"*' for word in words)
+        cursor.execute(
+            'SELECT post_id, rank FROM ('
+            '  SELECT post_id, MIN(score) AS rank FROM ('
+            '    SELECT post_id, rank AS score'
+            '    FROM posts_search WHERE posts_search MATCH %s'
+            '  ) GROUP BY post_id'
+            ') WHERE rank > %s OR (rank = %s AND post_id > %s)'
+            ' ORDER BY rank, post_id LIMIT %s',
+            [expression, after[0], after[0], after[1], limit]
+        )
+        return cursor.fetchall()
+
+
+class PostgresBackend:
+    def delete(self, cursor, kind, ids):
+        cursor.execute(
+            'DELETE FROM posts_search '
+            f'WHERE kind = %s AND object_id IN ({_placeholders(ids)})',
+            [kind, *ids]
+        )
+
+    def delete_post(self, cursor, post_id):
+        cursor.execute(
+            'DELETE FROM posts_search WHERE post_id = %s', [post_id]
+        )
+
+    def insert(self, cursor, rows):
+        _insert(
+            cursor,
+            'INSERT INTO posts_search (body, post_id, kind, object_id, '
+            'document) VALUES ',
+            "(%s, %s, %s, %s, to_tsvector('russian', %s))",
+            [row + (row[0],) for row in rows]
+        )
+
+    def match(self, cursor, words, after, limit):
+        expression = ' & '.join(f'{word}:*' for word in words)
+        cursor.execute(
+            'SELECT post_id, rank FROM ('
+            '  SELECT post_id,'
+            "  MIN(-ts_rank(document, to_tsquery('russian', %s))) AS rank"
+            '  FROM posts_search'
+            "  WHERE document @@ to_tsquery('russian', %s)"
+            '  GROUP BY post_id'
+            ') AS matches WHERE rank > %s OR (rank = %s AND post_id > %s)'
+            ' ORDER BY rank, post_id LIMIT %s',
+            [expression, expression, after[0], after[0], after[1], limit]
+        )
+        return cursor.fetchall()
+
+
+class ScanBackend:
+    """Other databases: no index, documents are not stored."""
+
+    def delete(self, cursor, kind, ids):
+        pass
+
+    def delete_post(self, cursor, post_id):
+        pass
+
+    def insert(self, cursor, rows):
+        pass
+
+    def match(self, cursor, words, after, limit):
+        from .models import Post
+
+        posts = Post.objects.filter(pk__gt=after[1]).order_by('pk')
+        for word in words:
+            posts = posts.filter(text__icontains=word)
+        return [(pk, 0.0) for pk in posts.values_list('pk', flat=True)[:limit]]
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgresBackend,
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, ScanBackend)()
+
+
+def post_body(post):
+    parts = [post.text, post.author.get_full_name(), post.author.username]
+    if post.group_id:
+        parts.append(post.group.title)
+    return '\n'.join(parts)
+
+
+def index_posts(posts):
+    """(Re)writes documents of the posts."""
+    posts = list(posts)
+    if not posts:
+        return
+    backend = get_backend()
+    ids = [post.pk for post in posts]
+    with transaction.atomic(), connection.cursor() as cursor:
+        backend.delete(cursor, POST, ids)
+        backend.insert(
+            cursor,
+            [(post_body(post), post.pk, POST, post.pk) for post in posts]
+        )
+
+
+def index_comments(comments):
+    """(Re)writes documents of the comments."""
+    comments = list(comments)
+    if not comments:
+        return
+    backend = get_backend()
+    ids = [comment.pk for comment in comments]
+    with transaction.atomic(), connection.cursor() as cursor:
+        backend.delete(cursor, COMMENT, ids)
+        backend.insert(
+            cursor,
+            [
+                (comment.text, comment.post_id, COMMENT, comment.pk)
+                for comment in comments
+            ]
+        )
+
+
+def index_comment(comment):
+    index_comments([comment])
+
+
+def remove_post(post_id):
+    with connection.cursor() as cursor:
+        get_backend().delete_post(cursor, post_id)
+
+
+def remove_comment(comment_id):
+    with connection.cursor() as cursor:
+        get_backend().delete(cursor, COMMENT, [comment_id])
+
+
+def encode_cursor(rank, post_id):
+    return urlsafe_base64_encode(force_bytes(f'{rank!r}|{post_id}'))
+
+
+def decode_cursor(token):
+    try:
+        rank, post_id = force_str(urlsafe_base64_decode(token)).split('|')
+        return float(rank), int(post_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise InvalidCursor('Неверный курсор')
+
+
+def search(query, cursor=None, limit=10):
+    """Returns (ranked post ids, next cursor) of one results page."""
+    words = _words(query)
+    if not words:
+        return [], None
+    after = decode_cursor(cursor) if cursor else (float('-inf'), 0)
+    with connection.cursor() as db_cursor:
+        rows = get_backend().match(db_cursor, words, after, limit + 1)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        post_id, rank = rows[-1]
+        next_cursor = encode_cursor(rank, post_id)
+    return [post_id for post_id, _ in rows], next_cursor
@@ -0,0 +1,193 @@
+"""Synthetic users, groups, posts, comments and follows for load tests.
+
+Popularity follows a power law: a few authors write most posts and
+gather most followers, like on a real site. Rows are written with
+bulk_create, then indexed, fanned out and counted like imported posts.
+"""
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from . import counters, search, transfer
+from .models import Comment, Follow, Group, Post, User
+
+PERIOD = timedelta(days=365)
+# Zipf exponent of author popularity.
+SKEW = 1.1
+
+
+def _last_pk(model):
+    return model.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0
+
+
+def _bulk_create(model, rows, batch_size):
+    for batch in transfer.batched(rows, batch_size):
+        # The backend picks the statement size, SQLite caps it.
+        with transaction.atomic():
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Seeder:
+    def __init__(self, seed=None, batch_size=1000):
+        self.random = random.Random(seed)
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(seed)
+        self.batch_size = batch_size
+        self.now = timezone.now()
+
+    def past(self, period=PERIOD):
+        return self.now - timedelta(
+            seconds=self.random.uniform(0, period.total_seconds())
+        )
+
+    def create_users(self, amount):
+        first = _last_pk(User) + 1
+        password = make_password(None)
+        _bulk_create(
+            User,
+            (
+                User(
+                    username=f'seed{number}',
+                    first_name=self.fake.first_name(),
+                    last_name=self.fake.last_name(),
+                    password=password,
+                )
+                for number in range(first, first + amount)
+            ),
+            self.batch_size,
+        )
+        ids = list(User.objects.filter(pk__gte=first).values_list(
+            'pk', flat=True
+        ))
+        self.random.shuffle(ids)
+        return ids
+
+    def create_groups(self, amount):
+        first = _last_pk(Group) + 1
+        _bulk_create(
+            Group,
+            (
+                Group(
+                    title=self.fake.sentence(nb_words=3)[:200],
+                    slug=f'group{number}',
+                    description=self.fake.paragraph(),
+                )
+                for number in range(first, first + amount)
+            ),
+            self.batch_size,
+        )
+        return list(Group.objects.filter(pk__gte=first).values_list(
+            'pk', flat=True
+        ))
+
+    def popularity(self, amount):
+        """Cumulative power-law weights, index 0 is the most popular."""
+        return list(accumulate(
+            1 / (rank + 1) ** SKEW for rank in range(amount)
+        ))
+
+    def create_follows(self, user_ids, per_user):
+        if per_user <= 0 or len(user_ids) < 2:
+            return
+        weights = self.popularity(len(user_ids))
+
+        def follows():
+            for user_id in user_ids:
+                amount = min(
+                    int(self.random.expovariate(1 / per_user)),
+                    len(user_ids) - 1,
+                )
+                authors = set(self.random.choices(
+                    user_ids, cum_weights=weights, k=amount
+                ))
+                authors.discard(user_id)
+                for author_id in authors:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        _bulk_create(Follow, follows(), self.batch_size)
+
+    def create_posts(self, amount, user_ids, group_ids):
+        if not user_ids:
+            return
+        weights = self.popularity(len(user_ids))
+        _bulk_create(
+            Post,
+            (
+                Post(
+                    text=self.fake.text(max_nb_chars=400),
+                    created=self.past(),
+                    author_id=self.random.choices(
+                        user_ids, cum_weights=weights
+                    )[0],
+                    group_id=(
+                        self.random.choice(group_ids)
+                        if group_ids and self.random.random() < 0.6
+                        else None
+                    ),
+                )
+                for _ in range(amount)
+            ),
+            self.batch_size,
+        )
+
+    def create_comments(self, amount, user_ids, posts):
+        def comments():
+            for _ in range(amount):
+                post_id, created = self.random.choice(posts)
+                yield Comment(
+                    post_id=post_id,
+                    author_id=self.random.choice(user_ids),
+                    text=self.fake.sentence(),
+                    created=min(
+                        created + timedelta(
+                            hours=self.random.expovariate(1 / 24)
+                        ),
+                        self.now,
+                    ),
+                )
+
+        _bulk_create(Comment, comments(), self.batch_size)
+
+    def seed(self, users, groups, posts, comments, follows, progress=None):
+        """Creates the rows and does the signals' work for them."""
+        progress = progress or (lambda message: None)
+        last_post = _last_pk(Post)
+        last_comment = _last_pk(Comment)
+        user_ids = self.create_users(users)
+        progress(f'Пользователей: {len(user_ids)}')
+        group_ids = self.create_groups(groups)
+        progress(f'Групп: {len(group_ids)}')
+        self.create_follows(user_ids, follows)
+        progress(f'Подписок: {Follow.objects.count()}')
+        with transfer.keeping_created(Post, Comment):
+            self.create_posts(posts, user_ids, group_ids)
+            progress(f'Постов: {posts}')
+            if user_ids and posts:
+                self.create_comments(
+                    comments,
+                    user_ids,
+                    list(Post.objects.filter(pk__gt=last_post).values_list(
+                        'pk', 'created'
+                    )),
+                )
+                progress(f'Комментариев: {comments}')
+        transfer.finish_import(last_post, self.batch_size)
+        # Follows between the new users are counted here.
+        counters.recount_users(user_ids, self.batch_size)
+        new_comments = Comment.objects.order_by('pk')
+        while True:
+            batch = list(
+                new_comments.filter(pk__gt=last_comment)[:self.batch_size]
+            )
+            if not batch:
+                break
+            last_comment = batch[-1].pk
+            search.index_comments(batch)
+        progress('Индексы и счётчики обновлены')
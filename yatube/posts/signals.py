@@ -0,0 +1,232 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (cards, counters, follows, pages, search, thumbnails,
+               timeline)
+from .models import Comment, Follow, Group, Post, PostStats, User, UserStats
+
+AUTHOR_NAME_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Post)
+def push_to_timelines(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created and instance.user_id and instance.author_id:
+        timeline.backfill(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    if instance.user_id and instance.author_id:
+        timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, created, **kwargs):
+    if instance.image and instance.image.name != instance._saved_image:
+        thumbnails.schedule(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_saved_state(sender, instance, **kwargs):
+    instance._saved_group_id = instance._saved_image = None
+    if instance.pk is not None:
+        instance._saved_group_id, instance._saved_image = (
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group_id', 'image'
+            ).first() or (None, None)
+        )
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(UserStats, instance.author_id, 'posts', 1)
+        counters.add_group_post(instance)
+    elif instance._saved_group_id != instance.group_id:
+        counters.remove_group_post(
+            instance._saved_group_id, instance.author_id
+        )
+        counters.add_group_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.bump(UserStats, instance.author_id, 'posts', -1)
+    counters.remove_group_post(instance.group_id, instance.author_id)
+
+
+@receiver(post_save, sender=Group)
+def start_group_stats(sender, instance, created, **kwargs):
+    # Empty groups are listed in the directory too.
+    if created:
+        counters.group_stats(instance)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(PostStats, instance.post_id, 'comments', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    counters.bump(PostStats, instance.post_id, 'comments', -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(UserStats, instance.author_id, 'followers', 1)
+        counters.bump(UserStats, instance.user_id, 'following', 1)
+
+
+@receiver(post_save, sender=Follow)
+def flag_popular_author(sender, instance, created, **kwargs):
+    # After count_follow, which moves the follower counter.
+    if created:
+        timeline.mark_popular(instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.bump(UserStats, instance.author_id, 'followers', -1)
+    counters.bump(UserStats, instance.user_id, 'following', -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def expire_post_card(sender, instance, **kwargs):
+    cards.bump_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def expire_commented_card(sender, instance, **kwargs):
+    cards.bump_post(instance.post_id)
+
+
+@receiver(post_save, sender=User)
+def expire_author_cards(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not AUTHOR_NAME_FIELDS & set(update_fields):
+        return
+    cards.bump_author(instance.pk)
+    # Comment lists show the names too and are versioned by their post.
+    cards.bump_post(*Comment.objects.filter(
+        author=instance
+    ).values_list('post_id', flat=True).distinct())
+
+
+def expire_post_pages(post, *group_ids):
+    slugs = Group.objects.filter(
+        pk__in=[pk for pk in group_ids if pk is not None]
+    ).values_list('slug', flat=True)
+    pages.bump(
+        pages.index_feed(),
+        pages.profile_feed(post.author.username),
+        *[pages.group_feed(slug) for slug in slugs]
+    )
+
+
+@receiver(post_save, sender=Post)
+def expire_saved_post_pages(sender, instance, created, **kwargs):
+    group_ids = [instance.group_id]
+    if not created:
+        group_ids.append(instance._saved_group_id)
+    expire_post_pages(instance, *group_ids)
+
+
+@receiver(post_delete, sender=Post)
+def expire_deleted_post_pages(sender, instance, **kwargs):
+    if User.objects.filter(pk=instance.author_id).exists():
+        expire_post_pages(instance, instance.group_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def expire_commented_post_pages(sender, instance, **kwargs):
+    post = Post.objects.filter(pk=instance.post_id).select_related(
+        'author'
+    ).first()
+    if post is not None:
+        expire_post_pages(post, post.group_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def expire_group_pages(sender, instance, **kwargs):
+    pages.bump(
+        pages.index_feed(),
+        pages.group_feed(instance.slug),
+        pages.groups_feed(),
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def expire_followed_profile(sender, instance, **kwargs):
+    author = User.objects.filter(pk=instance.author_id).first()
+    if author is not None:
+        pages.bump(pages.profile_feed(author.username))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def expire_follow_states(sender, instance, **kwargs):
+    follows.expire(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def expire_author_pages(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not AUTHOR_NAME_FIELDS & set(update_fields):
+        return
+    slugs = Group.objects.filter(
+        posts__author=instance
+    ).values_list('slug', flat=True).distinct()
+    pages.bump(
+        pages.index_feed(),
+        pages.profile_feed(instance.username),
+        *[pages.group_feed(slug) for slug in slugs]
+    )
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index_posts([instance])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.remove_comment(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def reindex_group_posts(sender, instance, created, **kwargs):
+    if not created:
+        search.index_posts(
+            instance.posts.select_related('author', 'group').iterator()
+        )
+
+
+@receiver(post_save, sender=User)
+def reindex_author_posts(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not AUTHOR_NAME_FIELDS & set(update_fields):
+        return
+    search.index_posts(
+        instance.posts.select_related('author', 'group').iterator()
+    )
@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='Old', last_name='Name'
+        )
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test_slug'
+        )
+        cls.post = Post.objects.create(
+            text='cached text',
+            author=cls.user,
+            group=cls.group
+        )
+        cls.address = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug}
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_card_served_from_cache(self):
+        """Card is reused while the post is unchanged"""
+        self.client.get(self.address)
+        Post.objects.filter(pk=self.post.pk).update(text='silent change')
+        response = self.client.get(self.address)
+        self.assertContains(response, 'cached text')
+
+    def test_post_edit_expires_card(self):
+        """Saving the post renders a fresh card"""
+        self.client.get(self.address)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'edited text'
+        post.save()
+        response = self.client.get(self.address)
+        self.assertContains(response, 'edited text')
+
+    def test_comment_expires_card(self):
+        """New comment renders a fresh comment counter"""
+        self.client.get(self.address)
+        Comment.objects.create(post=self.post, author=self.user, text='c')
+        response = self.client.get(self.address)
+        self.assertContains(response, 'Комментариев: 1')
+
+    def test_author_rename_expires_card(self):
+        """Renaming the author renders fresh cards"""
+        self.client.get(self.address)
+        self.user.first_name = 'New'
+        self.user.save()
+        response = self.client.get(self.address)
+        self.assertContains(response, 'New Name')
+
+
+class FeedPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test_slug'
+        )
+        cls.post = Post.objects.create(
+            text='first text',
+            author=cls.user,
+            group=cls.group
+        )
+        cls.ADDRESSES = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_new_post_expires_feed_pages(self):
+        """New post shows up at once on every feed page"""
+        for address in self.ADDRESSES:
+            self.client.get(address)
+        Post.objects.create(
+            text='second text', author=self.user, group=self.group
+        )
+        for address in self.ADDRESSES:
+            with self.subTest(address=address):
+                self.assertContains(self.client.get(address), 'second text')
+
+    def test_variants_cached_separately(self):
+        """Anonymous and authorized readers get their own pages"""
+        for address in self.ADDRESSES:
+            with self.subTest(address=address):
+                self.client.get(address)
+                response = self.authorized_client.get(address)
+                self.assertContains(response, self.user.username)
+                self.assertContains(response, 'Выйти')
+                self.assertNotContains(self.client.get(address), 'Выйти')
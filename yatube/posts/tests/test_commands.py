@@ -0,0 +1,199 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts import search
+from posts.models import (Comment, Follow, Group, GroupStats, Post, PostStats,
+                          TimelineEntry, User, UserStats)
+
+
+class CommandsTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test_slug'
+        )
+        cls.post = Post.objects.create(
+            text='text1',
+            author=cls.user,
+            group=cls.group
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        Comment.objects.create(post=cls.post, author=cls.reader, text='c')
+
+    def test_explain_feeds_covers_every_feed(self):
+        """explain_feeds prints a plan for every feed"""
+        out = StringIO()
+        call_command('explain_feeds', stdout=out)
+        for feed in ('index', 'group', 'profile', 'follow', 'comments'):
+            with self.subTest(feed=feed):
+                self.assertIn(feed, out.getvalue())
+
+
+class TransferCommandsTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test_slug'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        return path
+
+    def test_import_jsonl(self):
+        """Posts are imported with their dates, authors and groups"""
+        records = (
+            {'text': 'first', 'author': 'auth', 'group': 'test_slug',
+             'created': '2020-01-01T10:00:00+00:00'},
+            {'text': 'second', 'author': 'newcomer', 'group': 'new_slug'},
+        )
+        path = self.write(
+            'posts.jsonl', '\n'.join(json.dumps(item) for item in records)
+        )
+        out = StringIO()
+        call_command('import_posts', path, '--batch-size=1', stdout=out)
+        first = Post.objects.get(text='first')
+        self.assertEqual(first.author, self.user)
+        self.assertEqual(first.group, self.group)
+        self.assertEqual(first.created.year, 2020)
+        second = Post.objects.get(text='second')
+        self.assertEqual(second.author.username, 'newcomer')
+        self.assertEqual(second.group.slug, 'new_slug')
+        self.assertIn('новых авторов: 1, новых групп: 1', out.getvalue())
+
+    def test_import_does_signals_work(self):
+        """Imported posts are counted, indexed and fanned out"""
+        path = self.write(
+            'posts.csv', 'text,author,group\nimported,auth,test_slug\n'
+        )
+        call_command('import_posts', path, stdout=StringIO())
+        post = Post.objects.get(text='imported')
+        self.assertEqual(UserStats.objects.get(user=self.user).posts, 1)
+        self.assertEqual(search.search('imported')[0], [post.pk])
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post
+        ).exists())
+
+    def test_import_recounts_touched_rows_only(self):
+        """Import rebuilds the stats of its authors and groups only"""
+        UserStats.objects.filter(user=self.user).update(posts=100)
+        UserStats.objects.filter(user=self.reader).update(following=100)
+        path = self.write(
+            'posts.csv', 'text,author,group\nimported,auth,test_slug\n'
+        )
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(UserStats.objects.get(user=self.user).posts, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).following, 100
+        )
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual((stats.posts, stats.authors), (1, 1))
+
+    def test_broken_record(self):
+        """Broken record stops the import with its line number"""
+        path = self.write(
+            'posts.jsonl', '{"text": "ok", "author": "auth"}\n{"text": "x"}'
+        )
+        with self.assertRaisesMessage(CommandError, 'Строка 2'):
+            call_command(
+                'import_posts', path, '--batch-size=1', stdout=StringIO()
+            )
+        self.assertTrue(Post.objects.filter(text='ok').exists())
+
+    def test_export_import_round_trip(self):
+        """Exported posts import back unchanged"""
+        Post.objects.create(
+            text='exported', author=self.user, group=self.group
+        )
+        for data_format in ('jsonl', 'csv'):
+            with self.subTest(format=data_format):
+                path = os.path.join(self.directory, f'dump.{data_format}')
+                call_command(
+                    'export_posts', path, f'--format={data_format}',
+                    stdout=StringIO()
+                )
+                call_command('import_posts', path, stdout=StringIO())
+                original, copy = Post.objects.filter(
+                    text='exported'
+                ).order_by('pk')[:2]
+                self.assertEqual(copy.created, original.created)
+                self.assertEqual(copy.author, original.author)
+                self.assertEqual(copy.group, original.group)
+                copy.delete()
+
+
+class SeedAndBenchmarkTests(TestCase):
+    def test_seed(self):
+        """seed creates rows and does the signals' work for them"""
+        call_command(
+            'seed', '--users=20', '--groups=2', '--posts=60',
+            '--comments=30', '--follows=3', '--seed=1', stdout=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(
+            sum(UserStats.objects.values_list('posts', flat=True)), 60
+        )
+        self.assertEqual(
+            sum(UserStats.objects.values_list('followers', flat=True)),
+            Follow.objects.count()
+        )
+        self.assertEqual(
+            sum(PostStats.objects.values_list('comments', flat=True)), 30
+        )
+        self.assertTrue(TimelineEntry.objects.exists())
+        comment = Comment.objects.first()
+        self.assertIn(comment.post_id, search.search(comment.text)[0])
+
+    def test_benchmark_report(self):
+        """benchmark_feeds measures every page and diffs with a baseline"""
+        call_command(
+            'seed', '--users=10', '--groups=1', '--posts=20',
+            '--comments=10', '--follows=3', '--seed=2', stdout=StringIO()
+        )
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'baseline.json')
+        call_command(
+            'benchmark_feeds', '--requests=2', '--cold', f'--output={path}',
+            stdout=StringIO()
+        )
+        with open(path, encoding='utf-8') as stream:
+            report = json.load(stream)
+        self.assertEqual(
+            set(report['pages']),
+            {'index', 'group', 'profile', 'follow', 'post_detail'}
+        )
+        self.assertGreater(report['pages']['index']['queries'], 0)
+        out = StringIO()
+        call_command(
+            'benchmark_feeds', '--requests=2', f'--compare={path}',
+            stdout=out
+        )
+        self.assertIn('index p50_ms', out.getvalue())
@@ -0,0 +1,132 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import conditional
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test_slug'
+        )
+        cls.post = Post.objects.create(
+            text='test text',
+            author=cls.user,
+            group=cls.group
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def revalidate(self, client, address):
+        etag = client.get(address)['ETag']
+        return client.get(address, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_not_modified(self):
+        """Unchanged pages answer 304 without querying posts"""
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for address in addresses:
+            with self.subTest(address=address):
+                etag = self.client.get(address)['ETag']
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(
+                        address, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertLessEqual(len(queries), 1)
+
+    def later(self, seconds):
+        """Moves the clock of core.conditional seconds ahead."""
+        clock = mock.patch.object(conditional, 'time')
+        clock.start().time_ns.return_value = (
+            time.time_ns() + seconds * 10 ** 9
+        )
+        self.addCleanup(clock.stop)
+
+    def test_last_modified(self):
+        """Feed pages revalidate by If-Modified-Since as well"""
+        address = reverse('posts:index')
+        response = self.client.get(address)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.later(1)
+        last_modified = self.client.get(address)['Last-Modified']
+        response = self.client.get(
+            address, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_last_modified_within_a_second(self):
+        """Changes in the second of the last one are not hidden by 304"""
+        newest = time.time_ns()
+        with mock.patch.object(conditional, 'time') as clock:
+            clock.time_ns.return_value = newest
+            self.assertIsNone(conditional.from_generations([newest]))
+            clock.time_ns.return_value = newest + 10 ** 9
+            self.assertGreater(
+                conditional.from_generations([newest]).timestamp(),
+                newest / 10 ** 9
+            )
+
+    def test_changes_give_fresh_page(self):
+        """New comment and edited post give fresh pages"""
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.client.get(detail)['ETag']
+        Comment.objects.create(post=self.post, author=self.user, text='c')
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = self.client.get(reverse('posts:index'))['ETag']
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'edited text'
+        post.save()
+        response = self.client.get(
+            reverse('posts:index'), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertContains(response, 'edited text')
+
+    def test_commenter_rename_gives_fresh_detail(self):
+        """Renaming a commenter gives a fresh post page"""
+        Comment.objects.create(post=self.post, author=self.reader, text='c')
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.client.get(detail)['ETag']
+        reader = User.objects.get(pk=self.reader.pk)
+        reader.username = 'renamed'
+        reader.save()
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'renamed')
+
+    def test_viewers_get_own_validators(self):
+        """Anonymous and authorized viewers never share an ETag"""
+        address = reverse('posts:index')
+        etag = self.client.get(address)['ETag']
+        response = self.reader_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_page(self):
+        """Follow page is fresh after following an author"""
+        address = reverse('posts:follow_index')
+        self.assertEqual(
+            self.revalidate(self.reader_client, address).status_code, 304
+        )
+        etag = self.reader_client.get(address)['ETag']
+        Follow.objects.create(user=self.reader, author=self.user)
+        response = self.reader_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'test text')
@@ -0,0 +1,95 @@
+from django.test import TestCase
+
+from posts import counters
+from posts.models import (Comment, Follow, Group, GroupStats, Post,
+                          PostStats, User, UserStats)
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test_slug'
+        )
+        cls.other_group = Group.objects.create(
+            title='other group',
+            slug='other_slug'
+        )
+
+    def test_post_counters_follow_create_edit_delete(self):
+        """Post counters follow creation, group change and deletion"""
+        post = Post.objects.create(
+            text='text', author=self.user, group=self.group
+        )
+        self.assertEqual(counters.user_stats(self.user).posts, 1)
+        self.assertEqual(counters.group_stats(self.group).posts, 1)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(counters.group_stats(self.group).posts, 0)
+        self.assertEqual(counters.group_stats(self.other_group).posts, 1)
+        post.delete()
+        self.assertEqual(counters.user_stats(self.user).posts, 0)
+        self.assertEqual(counters.group_stats(self.other_group).posts, 0)
+
+    def test_group_authors_and_last_post(self):
+        """Group authors and latest post follow creation and deletion"""
+        first = Post.objects.create(
+            text='first', author=self.user, group=self.group
+        )
+        second = Post.objects.create(
+            text='second', author=self.reader, group=self.group
+        )
+        Post.objects.create(text='third', author=self.user, group=self.group)
+        stats = counters.group_stats(self.group)
+        self.assertEqual((stats.posts, stats.authors), (3, 2))
+        second.delete()
+        stats = counters.group_stats(self.group)
+        self.assertEqual((stats.posts, stats.authors), (2, 1))
+        Post.objects.filter(group=self.group).exclude(pk=first.pk).delete()
+        stats = counters.group_stats(self.group)
+        self.assertEqual(stats.last_post, first.created)
+        first.delete()
+        stats = counters.group_stats(self.group)
+        self.assertEqual((stats.posts, stats.authors), (0, 0))
+        self.assertIsNone(stats.last_post)
+
+    def test_comment_and_follow_counters(self):
+        """Comment and follow counters follow creation and deletion"""
+        post = Post.objects.create(text='text', author=self.user)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='comment'
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        self.assertEqual(counters.post_stats(post).comments, 1)
+        self.assertEqual(counters.user_stats(self.user).followers, 1)
+        self.assertEqual(counters.user_stats(self.reader).following, 1)
+        comment.delete()
+        follow.delete()
+        self.assertEqual(counters.post_stats(post).comments, 0)
+        self.assertEqual(counters.user_stats(self.user).followers, 0)
+        self.assertEqual(counters.user_stats(self.reader).following, 0)
+
+    def test_missing_row_rebuilt(self):
+        """Missing stats row is rebuilt from real tables"""
+        Post.objects.create(text='text', author=self.user)
+        UserStats.objects.all().delete()
+        self.assertEqual(counters.user_stats(self.user).posts, 1)
+
+    def test_recount_repairs_drift(self):
+        """recount rewrites drifted counters"""
+        post = Post.objects.create(
+            text='text', author=self.user, group=self.group
+        )
+        Comment.objects.create(post=post, author=self.reader, text='c')
+        UserStats.objects.update(posts=100)
+        GroupStats.objects.update(posts=100)
+        PostStats.objects.update(comments=100)
+        counters.recount()
+        self.assertEqual(counters.user_stats(self.user).posts, 1)
+        self.assertEqual(counters.group_stats(self.group).posts, 1)
+        self.assertEqual(counters.group_stats(self.group).authors, 1)
+        self.assertEqual(counters.post_stats(post).comments, 1)
@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+EXIF_ORIENTATION = 0x0112
+ROTATED_90 = 6
+
+
+def make_jpeg(size, orientation=None):
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    exif[0x010F] = 'Test camera'
+    if orientation:
+        exif[EXIF_ORIENTATION] = orientation
+    output = BytesIO()
+    image.save(output, format='JPEG', exif=exif.tobytes())
+    return output.getvalue()
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_MAX_SIZE=(100, 100)
+)
+class ImageIngestTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, content, name='photo.jpg'):
+        return Post.objects.create(
+            text='text',
+            author=self.user,
+            image=SimpleUploadedFile(
+                name=name, content=content, content_type='image/jpeg'
+            )
+        )
+
+    def test_image_rotated_downscaled_and_stripped(self):
+        """Upload is rotated, fits max size and loses EXIF"""
+        post = self.create_post(make_jpeg((400, 200), ROTATED_90))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (50, 100))
+            self.assertEqual(len(stored.getexif()), 0)
+
+    @override_settings(POST_IMAGE_FORMAT='WEBP')
+    def test_image_reencoded_to_configured_format(self):
+        """Upload is stored in the configured format"""
+        post = self.create_post(make_jpeg((40, 40)))
+        self.assertTrue(post.image.name.endswith('.webp'))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, 'WEBP')
+
+    def test_identical_upload_reuses_file(self):
+        """Same upload twice is stored once"""
+        content = make_jpeg((40, 40))
+        first = self.create_post(content)
+        second = self.create_post(content, name='copy.jpg')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_hash, second.image_hash)
@@ -0,0 +1,149 @@
+import debug_toolbar
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+
+from posts import search
+from posts.models import Comment, Group, Post, User
+
+# The project urls with the debug toolbar, which adds them under DEBUG.
+urlpatterns = [
+    path('', include('yatube.urls')),
+    path('__debug__/', include(debug_toolbar.urls)),
+]
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='writer', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Классика',
+            slug='classic',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            text='Все счастливые семьи похожи друг на друга',
+            author=cls.author,
+            group=cls.group
+        )
+        cls.other_post = Post.objects.create(
+            text='Другой текст',
+            author=User.objects.create_user(username='other')
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def found(self, query):
+        ids, _ = search.search(query)
+        return ids
+
+    def test_post_text_found(self):
+        """Post is found by a word and by a prefix of its text"""
+        self.assertEqual(self.found('семьи'), [self.post.pk])
+        self.assertEqual(self.found('счастлив'), [self.post.pk])
+
+    def test_group_and_author_found(self):
+        """Post is found by its group title and author names"""
+        self.assertEqual(self.found('классика'), [self.post.pk])
+        self.assertEqual(self.found('Толстой'), [self.post.pk])
+        self.assertEqual(self.found('writer'), [self.post.pk])
+
+    def test_comment_found(self):
+        """Comment text finds its post until the comment is deleted"""
+        comment = Comment.objects.create(
+            post=self.other_post, author=self.author, text='Замечательно'
+        )
+        self.assertEqual(self.found('замечательно'), [self.other_post.pk])
+        comment.delete()
+        self.assertEqual(self.found('замечательно'), [])
+
+    def test_index_follows_changes(self):
+        """Edited, renamed and deleted content is reindexed"""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(self.found('семьи'), [])
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Проза'
+        group.save()
+        self.assertEqual(self.found('проза'), [post.pk])
+        author = User.objects.get(pk=self.author.pk)
+        author.last_name = 'Николаевич'
+        author.save()
+        self.assertEqual(self.found('николаевич'), [post.pk])
+        post.delete()
+        self.assertEqual(self.found('проза'), [])
+
+    def test_empty_query(self):
+        """Query without words finds nothing"""
+        self.assertEqual(search.search('  !? '), ([], None))
+
+    def test_cursor_pages(self):
+        """Cursor pages cover every match once"""
+        for number in range(5):
+            Post.objects.create(text=f'Лето {number}', author=self.author)
+        first, cursor = search.search('лето', limit=3)
+        second, last = search.search('лето', cursor=cursor, limit=3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertIsNone(last)
+        self.assertFalse(set(first) & set(second))
+
+    @override_settings(POSTS_AMOUNT=1)
+    def test_search_view(self):
+        """Search page shows ranked posts and a link to the next page"""
+        Post.objects.create(text='Семьи разные', author=self.author)
+        response = self.client.get(reverse('posts:search'), {'q': 'семьи'})
+        self.assertEqual(len(response.context['object_list']), 1)
+        self.assertEqual(response.context['query'], 'семьи')
+        self.assertIsNotNone(response.context['next_cursor'])
+        response = self.client.get(reverse('posts:search'), {
+            'q': 'семьи', 'cursor': response.context['next_cursor']
+        })
+        self.assertEqual(len(response.context['object_list']), 1)
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_invalid_cursor(self):
+        """Broken cursor gives 404"""
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'семьи', 'cursor': 'broken'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(DEBUG=True, ROOT_URLCONF=__name__)
+    def test_index_writes_under_debug_toolbar(self):
+        """Posts and comments are saved with the debug toolbar tracking SQL"""
+        self.client.force_login(self.author)
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Отладочный пост'}
+        )
+        self.assertEqual(response.status_code, 302)
+        post = Post.objects.get(text='Отладочный пост')
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Отладочный комментарий'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.found('отладочный'), [post.pk])
+
+    def test_documents_deleted_by_rowid(self):
+        """Reindexing looks old documents up by rowid instead of a scan"""
+        with CaptureQueriesContext(connection) as queries:
+            search.index_posts([self.post])
+        delete = next(
+            query['sql'] for query in queries
+            if query['sql'].startswith('DELETE FROM posts_search')
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {delete}')
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        # FTS5 reports a rowid lookup as ":=", a full scan as ":".
+        self.assertIn('INDEX 0:=', plan)
+        self.assertEqual(self.found('семьи'), [self.post.pk])
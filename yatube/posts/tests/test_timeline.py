@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.queries import QueryLog
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.old_post = Post.objects.create(
+            text='old text',
+            author=cls.author
+        )
+
+    def setUp(self) -> None:
+        self.authorized_client = self.client
+        self.authorized_client.force_login(self.reader)
+        cache.clear()
+
+    def follow(self):
+        self.authorized_client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': self.author.username}
+        ))
+
+    def test_follow_backfills_timeline(self):
+        """Following copies recent author posts into the timeline"""
+        self.follow()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=self.old_post
+        ).exists())
+
+    def test_new_post_fanned_out(self):
+        """New post is pushed into followers timelines"""
+        self.follow()
+        post = Post.objects.create(text='new text', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post
+        ).exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['object_list'][0], post)
+
+    def test_unfollow_prunes_timeline(self):
+        """Unfollowing removes author posts from the timeline"""
+        self.follow()
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}
+        ))
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_read_on_the_fly(self):
+        """Posts of popular authors skip fan-out but reach the feed"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='new text', author=self.author)
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(post, response.context['object_list'])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_stays_popular(self):
+        """Posts of a once popular author stay in feeds after unfollows"""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=other, author=self.author)
+        self.follow()
+        post = Post.objects.create(text='new text', author=self.author)
+        newcomer = User.objects.create_user(username='newcomer')
+        Follow.objects.create(user=newcomer, author=self.author)
+        Follow.objects.filter(user=other).delete()
+        Follow.objects.filter(user=newcomer).delete()
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(post, response.context['object_list'])
+        self.assertIn(self.old_post, response.context['object_list'])
+
+    def test_feed_does_not_count_followers(self):
+        """Follow feed reads popularity from counters, not Follow rows"""
+        self.follow()
+        with QueryLog() as log:
+            self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertFalse(
+            [query for query in log.queries if 'GROUP BY' in query.sql]
+        )
+
+    @override_settings(TIMELINE_LENGTH=1)
+    def test_trim_keeps_newest_entries(self):
+        """Trimming leaves TIMELINE_LENGTH newest entries"""
+        self.follow()
+        post = Post.objects.create(text='new text', author=self.author)
+        timeline.trim(self.reader)
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(
+                user=self.reader
+            ).values_list('post', flat=True)),
+            [post.pk]
+        )
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from io import StringIO
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Post, PostScore, User
+from posts.tests.utils import QueryBudgetMixin
+
+
+class TrendingTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.hot = Post.objects.create(text='hot', author=cls.author)
+        cls.warm = Post.objects.create(text='warm', author=cls.author)
+        cls.quiet = Post.objects.create(text='quiet', author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def comment(self, post, hours_ago=0):
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='comment'
+        )
+        Comment.objects.filter(pk=comment.pk).update(
+            created=timezone.now() - timedelta(hours=hours_ago)
+        )
+
+    def test_score_decays(self):
+        """Fresh comments and fresh posts score higher"""
+        now = 100 * trending.HOUR
+        scores = trending.score(
+            np.array([1, 2, 3]),
+            np.array([now, now, now - 24 * trending.HOUR]),
+            np.array([1, 2, 3]),
+            np.array([now, now - 12 * trending.HOUR, now]),
+            now,
+        )
+        self.assertGreater(scores[0], scores[1])
+        self.assertGreater(scores[0], scores[2])
+
+    def test_recompute_ranks_commented_posts(self):
+        """Only posts commented within the window are ranked"""
+        for _ in range(3):
+            self.comment(self.hot)
+        self.comment(self.warm)
+        self.comment(self.quiet, hours_ago=24 * 7)
+        self.assertEqual(trending.recompute(batch_size=1), 2)
+        self.assertEqual(
+            list(PostScore.objects.order_by('-score').values_list(
+                'post', flat=True
+            )),
+            [self.hot.pk, self.warm.pk]
+        )
+
+    def test_recompute_replaces_scores(self):
+        """Scores of posts fallen out of the window are dropped"""
+        self.comment(self.hot)
+        trending.recompute()
+        Comment.objects.update(created=timezone.now() - timedelta(days=7))
+        self.assertEqual(trending.recompute(), 0)
+        self.assertFalse(PostScore.objects.exists())
+
+    def test_trending_page(self):
+        """Trending page shows scored posts best first"""
+        self.comment(self.warm)
+        self.comment(self.hot)
+        self.comment(self.hot)
+        address = reverse('posts:trending')
+        self.assertEqual(
+            list(self.client.get(address).context['object_list']), []
+        )
+        trending.recompute()
+        self.assertEqual(
+            list(self.client.get(address).context['object_list']),
+            [self.hot, self.warm]
+        )
+        cache.clear()
+        self.assertQueryBudget(self.client, address, 1)
+
+    def test_command(self):
+        """update_trending reports scored posts"""
+        self.comment(self.hot)
+        out = StringIO()
+        call_command('update_trending', stdout=out)
+        self.assertIn('Оценено постов: 1', out.getvalue())
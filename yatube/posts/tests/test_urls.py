@@ -90,7 +90,7 @@ class PostURLTests(TestCase):
         response = self.client.get('/')
         cached_post = response.context['object_list'][0].id
         cached_content = response.content
-        Post.objects.get(pk=cached_post).delete()
+        Post.objects.filter(pk=cached_post).update(text='silent change')
         response = self.client.get('/')
         reload_content = response.content
         self.assertEqual(cached_content, reload_content)
@@ -98,3 +98,12 @@ class PostURLTests(TestCase):
         response = self.client.get('/')
         reload_content = response.content
         self.assertNotEqual(cached_content, reload_content)
+
+    def test_cache_page_expires_on_delete(self):
+        """Deleting a post expires cached pages at once"""
+        response = self.client.get('/')
+        cached_post = response.context['object_list'][0].id
+        cached_content = response.content
+        Post.objects.get(pk=cached_post).delete()
+        response = self.client.get('/')
+        self.assertNotEqual(cached_content, response.content)
@@ -4,7 +4,8 @@ from django.test import Client, TestCase
 from django.urls import reverse
 
 from posts.forms import PostForm
-from posts.models import Follow, Group, Post, User
+from posts.models import Comment, Follow, Group, Post, User
+from posts.tests.utils import QueryBudgetMixin
 
 
 class PostPagesTests(TestCase):
@@ -345,3 +346,331 @@ class PaginatorViewsTest(TestCase):
                     response = self.authorized_client.get(address + '?page=2')
                     text = response.context.get('page_obj').object_list[0].text
                     self.assertEqual(text, required_post.text)
+
+    def test_cursor_pages_walk_feed(self):
+        """Cursor links lead to the next page and back"""
+        for address, value in self.PAGES_CONTEXT.items():
+            if 'page_obj' in value:
+                with self.subTest(address=address):
+                    first = self.authorized_client.get(address)
+                    first_page = first.context['page_obj']
+                    self.assertFalse(first_page.has_previous())
+                    second = self.authorized_client.get(
+                        address, {'cursor': first_page.next_cursor}
+                    )
+                    second_page = second.context['page_obj']
+                    self.assertEqual(
+                        len(second_page),
+                        Post.objects.count() % settings.POSTS_AMOUNT
+                    )
+                    self.assertFalse(second_page.has_next())
+                    back = self.authorized_client.get(
+                        address, {'cursor': second_page.previous_cursor}
+                    )
+                    self.assertEqual(
+                        list(back.context['page_obj']),
+                        list(first_page)
+                    )
+
+    def test_invalid_cursor_not_found(self):
+        """Broken cursor token gives 404"""
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'cursor': 'broken'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class FeedQueriesTest(QueryBudgetMixin, TestCase):
+    """Feed pages cost a fixed number of queries"""
+    FEED_BUDGET = {
+        'posts:index': 3,
+        'posts:group_list': 4,
+        'posts:profile': 5,
+        'posts:follow_index': 4,
+    }
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test_slug'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.ADDRESSES = {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list',
+                kwargs={'slug': cls.group.slug}
+            ),
+            'posts:profile': reverse(
+                'posts:profile',
+                kwargs={'username': cls.user.username}
+            ),
+            'posts:follow_index': reverse('posts:follow_index'),
+        }
+
+    def setUp(self) -> None:
+        self.authorized_client = self.client
+        self.authorized_client.force_login(self.reader)
+
+    def create_posts(self, amount):
+        for i in range(amount):
+            Post.objects.create(
+                text=f'text {i}',
+                author=self.user,
+                group=self.group
+            )
+
+    def test_feed_queries_do_not_grow_with_page(self):
+        """Feed query count does not depend on posts on the page"""
+        Post.objects.create(text='text', author=self.user, group=self.group)
+        single = {}
+        for name, address in self.ADDRESSES.items():
+            cache.clear()
+            single[name] = self.assertQueryBudget(
+                self.authorized_client, address, self.FEED_BUDGET[name]
+            )
+        self.create_posts(settings.POSTS_AMOUNT)
+        for name, address in self.ADDRESSES.items():
+            with self.subTest(address=address):
+                cache.clear()
+                self.assertEqual(
+                    self.assertQueryBudget(
+                        self.authorized_client,
+                        address,
+                        self.FEED_BUDGET[name]
+                    ),
+                    single[name]
+                )
+
+    def test_feeds_of_many_authors_without_n_plus_one(self):
+        """Feed pages of many authors and groups repeat no queries"""
+        for i in range(settings.POSTS_AMOUNT):
+            author = User.objects.create_user(username=f'author{i}')
+            group = Group.objects.create(title=f'group {i}', slug=f'group{i}')
+            Post.objects.create(text=f'text {i}', author=author, group=group)
+        for name, address in (
+            ('posts:index', reverse('posts:index')),
+            ('posts:profile', reverse(
+                'posts:profile', kwargs={'username': 'author0'}
+            )),
+            ('posts:group_list', reverse(
+                'posts:group_list', kwargs={'slug': 'group0'}
+            )),
+        ):
+            with self.subTest(address=address):
+                cache.clear()
+                self.assertQueryBudget(
+                    self.authorized_client, address, self.FEED_BUDGET[name]
+                )
+
+
+class CommentPagesTest(QueryBudgetMixin, TestCase):
+    """Comments of a post are paginated"""
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(text='text', author=cls.user)
+        for i in range(settings.COMMENTS_AMOUNT + 3):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'comment {i}'
+            )
+        cls.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.id}
+        )
+        cls.comments_url = reverse(
+            'posts:comments', kwargs={'post_id': cls.post.id}
+        )
+
+    def test_detail_shows_first_comments_page(self):
+        """Detail page renders one page of comments"""
+        response = self.client.get(self.detail_url)
+        page = response.context['page_obj']
+        self.assertEqual(len(page), settings.COMMENTS_AMOUNT)
+        self.assertContains(response, page.next_cursor)
+
+    def test_fragment_continues_comments(self):
+        """Fragment endpoint renders the next comments page"""
+        page = self.client.get(self.detail_url).context['page_obj']
+        response = self.client.get(
+            self.comments_url, {'cursor': page.next_cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comment_list.html')
+        self.assertEqual(len(response.context['page_obj']), 3)
+        self.assertContains(response, 'comment 0')
+        self.assertNotContains(response, 'js-more-comments')
+
+    def test_json_comments(self):
+        """Comments come as JSON on request"""
+        response = self.client.get(self.comments_url, {'format': 'json'})
+        data = response.json()
+        self.assertEqual(len(data['comments']), settings.COMMENTS_AMOUNT)
+        self.assertEqual(data['comments'][0]['author'], self.user.username)
+        self.assertIsNotNone(data['next_cursor'])
+
+    def test_detail_queries_do_not_grow_with_comments(self):
+        """Detail page costs the same with many comments"""
+        first = self.assertQueryBudget(self.client, self.detail_url, 3)
+        for i in range(settings.COMMENTS_AMOUNT):
+            Comment.objects.create(
+                post=self.post, author=self.user, text=f'more {i}'
+            )
+        self.assertEqual(
+            self.assertQueryBudget(self.client, self.detail_url, 3), first
+        )
+
+
+class FollowButtonsTest(QueryBudgetMixin, TestCase):
+    """Feed cards carry follow buttons of the viewer"""
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='group', slug='group')
+        Post.objects.create(text='text', author=cls.author, group=cls.group)
+        Post.objects.create(text='own', author=cls.reader, group=cls.group)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_buttons_follow_state(self):
+        """Other authors' cards get a button reflecting the follow"""
+        follow_url = reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}
+        )
+        unfollow_url = reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}
+        )
+        for address in (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+        ):
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertContains(response, follow_url)
+                self.assertNotContains(
+                    response,
+                    reverse(
+                        'posts:profile_follow',
+                        kwargs={'username': 'reader'}
+                    )
+                )
+                Follow.objects.create(user=self.reader, author=self.author)
+                response = self.client.get(address)
+                self.assertContains(response, unfollow_url)
+                Follow.objects.all().delete()
+
+    def test_no_buttons_for_anonymous(self):
+        """Anonymous viewers get no follow buttons"""
+        self.client.logout()
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'btn-sm')
+
+    def test_states_do_not_cost_queries_per_author(self):
+        """Follow states of many authors come from one query"""
+        single = self.assertQueryBudget(
+            self.client, reverse('posts:index'), 4
+        )
+        for i in range(settings.POSTS_AMOUNT):
+            Post.objects.create(
+                text=f'text {i}',
+                author=User.objects.create_user(username=f'author{i}')
+            )
+        cache.clear()
+        self.assertEqual(
+            self.assertQueryBudget(self.client, reverse('posts:index'), 4),
+            single
+        )
+
+
+class GroupDirectoryTest(QueryBudgetMixin, TestCase):
+    """Group directory is read from the group stats rows"""
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.big = Group.objects.create(title='big group', slug='big')
+        cls.fresh = Group.objects.create(title='fresh group', slug='fresh')
+        cls.empty = Group.objects.create(title='empty group', slug='empty')
+        for i in range(3):
+            Post.objects.create(
+                text=f'text {i}', author=cls.user, group=cls.big
+            )
+        Post.objects.create(text='fresh', author=cls.user, group=cls.fresh)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def directory(self, **params):
+        response = self.client.get(reverse('posts:groups'), params)
+        return [stats.group for stats in response.context['object_list']]
+
+    def test_sorts(self):
+        """Groups are sorted by size or latest activity"""
+        self.assertEqual(
+            self.directory(), [self.big, self.fresh, self.empty]
+        )
+        self.assertEqual(
+            self.directory(sort='active'), [self.fresh, self.big, self.empty]
+        )
+
+    def test_cursor_pages(self):
+        """Cursor pages walk the whole directory once"""
+        for i in range(settings.GROUPS_AMOUNT):
+            Group.objects.create(title=f'group {i}', slug=f'group{i}')
+        for sort in ('posts', 'active'):
+            with self.subTest(sort=sort):
+                response = self.client.get(
+                    reverse('posts:groups'), {'sort': sort}
+                )
+                cursor = response.context['page_obj'].next_cursor
+                self.assertContains(response, f'sort={sort}&amp;cursor=')
+                last = self.client.get(
+                    reverse('posts:groups'), {'sort': sort, 'cursor': cursor}
+                ).context['object_list']
+                groups = [
+                    stats.group for stats in response.context['object_list']
+                ] + [stats.group for stats in last]
+                self.assertEqual(len(groups), Group.objects.count())
+                self.assertEqual(len(set(groups)), len(groups))
+
+    def test_cursor_pages_backwards(self):
+        """Previous cursors walk back through the same pages"""
+        for i in range(settings.GROUPS_AMOUNT * 2):
+            group = Group.objects.create(title=f'group {i}', slug=f'group{i}')
+            Post.objects.create(text='text', author=self.user, group=group)
+        for sort in ('posts', 'active'):
+            with self.subTest(sort=sort):
+                pages = []
+                params = {'sort': sort}
+                while True:
+                    page = self.client.get(
+                        reverse('posts:groups'), params
+                    ).context['page_obj']
+                    pages.append(list(page.object_list))
+                    if not page.next_cursor:
+                        break
+                    params['cursor'] = page.next_cursor
+                walked = [pages[-1]]
+                while page.previous_cursor:
+                    params['cursor'] = page.previous_cursor
+                    page = self.client.get(
+                        reverse('posts:groups'), params
+                    ).context['page_obj']
+                    walked.insert(0, list(page.object_list))
+                self.assertEqual(walked, pages)
+
+    def test_new_post_moves_group(self):
+        """A new post updates the directory"""
+        Post.objects.create(text='new', author=self.user, group=self.empty)
+        self.assertEqual(self.directory(sort='active')[0], self.empty)
+
+    def test_query_budget(self):
+        """Directory page costs a fixed number of queries"""
+        self.assertQueryBudget(self.client, reverse('posts:groups'), 1)
@@ -0,0 +1,20 @@
+from core.queries import QueryLog
+
+
+class QueryBudgetMixin:
+    """TestCase mixin checking how many queries a page costs."""
+
+    def assertQueryBudget(self, client, address, budget):
+        """Page is rendered within budget queries and without N+1s.
+
+        Returns query count.
+        """
+        with QueryLog() as log:
+            client.get(address)
+        self.assertLessEqual(
+            len(log), budget, f'{address} made {log.report()}'
+        )
+        self.assertFalse(
+            log.repeated(), f'{address} repeats queries, {log.report()}'
+        )
+        return len(log)
@@ -0,0 +1,57 @@
+"""Background pre-generation of post image thumbnails.
+
+sorl-thumbnail renders a thumbnail lazily inside the first request that
+shows it. Once a post with a new image is committed, every geometry of
+POST_THUMBNAILS is rendered by a worker pool instead, so feed pages only
+look the thumbnail up in the key-value store.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from sorl.thumbnail import get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails'
+        )
+    return _executor
+
+
+def pregenerate(image_name):
+    """Renders every configured thumbnail of the image."""
+    try:
+        for geometry, options in settings.POST_THUMBNAILS:
+            get_thumbnail(image_name, geometry, **options)
+    except Exception:
+        logger.exception('Thumbnails of %s failed', image_name)
+
+
+def _pregenerate_in_worker(image_name):
+    try:
+        pregenerate(image_name)
+    finally:
+        # Key-value store writes opened this thread's own connections.
+        connections.close_all()
+
+
+def schedule(post):
+    """Queues thumbnails of the post image once the post is committed."""
+    if not post.image:
+        return
+    image_name = post.image.name
+    if not settings.THUMBNAIL_WORKERS:
+        transaction.on_commit(lambda: pregenerate(image_name))
+        return
+    transaction.on_commit(
+        lambda: _get_executor().submit(_pregenerate_in_worker, image_name)
+    )
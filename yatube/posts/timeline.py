@@ -0,0 +1,125 @@
+"""Precomputed home timelines for the follow feed (fan-out-on-write).
+
+A new post id is pushed into the timeline of every follower of its
+author. Authors with more than TIMELINE_FANOUT_LIMIT followers are not
+fanned out: their posts are merged into the feed at read time. Such an
+author stays popular when followers leave, as the posts written
+meanwhile are in no timeline.
+"""
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Follow, Post, TimelineEntry, UserStats
+
+
+def _follower_ids(author):
+    """Follower ids of author, or None if the author is too popular."""
+    if UserStats.objects.filter(user=author, popular=True).exists():
+        return None
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    follower_ids = list(
+        Follow.objects.filter(author=author).values_list(
+            'user_id', flat=True
+        )[:limit + 1]
+    )
+    if len(follower_ids) > limit:
+        return None
+    return follower_ids
+
+
+def _popular_author_ids(user):
+    """Followed authors whose posts are read on the fly."""
+    return list(UserStats.objects.filter(
+        user__in=Follow.objects.filter(user=user).values('author'),
+        popular=True,
+    ).values_list('user_id', flat=True))
+
+
+def mark_popular(author_id):
+    """Flags the author as popular once over TIMELINE_FANOUT_LIMIT."""
+    UserStats.objects.filter(
+        user_id=author_id,
+        followers__gt=settings.TIMELINE_FANOUT_LIMIT,
+        popular=False,
+    ).update(popular=True)
+
+
+def fan_out(post):
+    """Pushes a freshly created post into followers' timelines."""
+    follower_ids = _follower_ids(post.author)
+    if not follower_ids:
+        return
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, created=post.created)
+            for user_id in follower_ids
+        ],
+        ignore_conflicts=True
+    )
+
+
+def fan_out_many(posts, filled):
+    """fan_out for a batch of posts ordered newest first.
+
+    filled counts the entries pushed to every user so far. Users who got
+    TIMELINE_LENGTH of them are skipped, older posts would be trimmed.
+    """
+    followers = {
+        author_id: _follower_ids(author_id) or ()
+        for author_id in {post.author_id for post in posts}
+    }
+    entries = []
+    for post in posts:
+        for user_id in followers[post.author_id]:
+            if filled[user_id] < settings.TIMELINE_LENGTH:
+                filled[user_id] += 1
+                entries.append(TimelineEntry(
+                    user_id=user_id, post=post, created=post.created
+                ))
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def backfill(user, author):
+    """Fills the timeline with recent posts of a just followed author."""
+    if _follower_ids(author) is None:
+        return
+    posts = Post.objects.filter(author=author).values_list(
+        'pk', 'created'
+    )[:settings.TIMELINE_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user=user, post_id=pk, created=created)
+            for pk, created in posts
+        ],
+        ignore_conflicts=True
+    )
+
+
+def prune(user, author):
+    """Drops posts of an unfollowed author from the timeline."""
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def trim(user):
+    """Deletes timeline entries beyond TIMELINE_LENGTH. Returns count."""
+    oldest_kept = TimelineEntry.objects.filter(user=user).values_list(
+        'created', flat=True
+    )[settings.TIMELINE_LENGTH - 1:settings.TIMELINE_LENGTH]
+    oldest_kept = list(oldest_kept)
+    if not oldest_kept:
+        return 0
+    deleted, _ = TimelineEntry.objects.filter(
+        user=user, created__lt=oldest_kept[0]
+    ).delete()
+    return deleted
+
+
+def feed_filter(user):
+    """Selects posts of followed authors from the precomputed timeline."""
+    timeline_ids = TimelineEntry.objects.filter(user=user).values(
+        'post_id'
+    )[:settings.TIMELINE_LENGTH]
+    popular_ids = _popular_author_ids(user)
+    if not popular_ids:
+        return Q(pk__in=timeline_ids)
+    return Q(pk__in=timeline_ids) | Q(author__in=popular_ids)
@@ -0,0 +1,237 @@
+"""Streaming import and export of posts as JSON Lines or CSV.
+
+Records flow through generators, so memory stays bounded by one batch
+whatever the size of the dump. A record is a post with its author and
+group referenced by username and slug:
+
+    {"id": 1, "text": "...", "created": "2022-02-01T10:00:00+00:00",
+     "author": "leo", "group": "cats", "image": "posts/cat.jpg"}
+
+Imported posts get new ids. Authors and groups are resolved through an
+in-memory cache, missing ones are created. bulk_create skips the
+signals, so imported posts are indexed, fanned out to timelines and
+counted afterwards in batches.
+"""
+import csv
+import json
+from collections import Counter
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, pages, search, timeline
+from .models import Group, Post, User
+
+FIELDS = ('id', 'text', 'created', 'author', 'group', 'image')
+FORMATS = ('jsonl', 'csv')
+
+
+class RecordError(ValueError):
+    pass
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def read_jsonl(lines):
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as error:
+            raise RecordError(f'Строка {number}: {error}')
+
+
+def read_csv(lines):
+    for number, row in enumerate(csv.DictReader(lines), 2):
+        yield number, row
+
+
+def write_jsonl(records, stream):
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def write_csv(records, stream):
+    writer = csv.DictWriter(stream, FIELDS)
+    writer.writeheader()
+    writer.writerows(records)
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+WRITERS = {'jsonl': write_jsonl, 'csv': write_csv}
+
+
+def export_records(batch_size):
+    """Yields every post as a record, oldest first."""
+    rows = Post.objects.order_by('pk').values_list(
+        'pk', 'text', 'created', 'author__username', 'group__slug', 'image'
+    ).iterator(chunk_size=batch_size)
+    for pk, text, created, author, group, image in rows:
+        yield {
+            'id': pk,
+            'text': text,
+            'created': created.isoformat(),
+            'author': author,
+            'group': group or None,
+            'image': image or None,
+        }
+
+
+class Lookup:
+    """Cache of natural key -> id, creating missing rows in bulk."""
+
+    def __init__(self, model, field, defaults):
+        self.model = model
+        self.field = field
+        self.defaults = defaults
+        self.ids = {}
+        self.created = 0
+
+    def resolve(self, keys):
+        missing = {key for key in keys if key and key not in self.ids}
+        if not missing:
+            return
+        self.ids.update(
+            self.model.objects.filter(
+                **{f'{self.field}__in': missing}
+            ).values_list(self.field, 'pk')
+        )
+        new = sorted(missing - set(self.ids))
+        if new:
+            self.model.objects.bulk_create(
+                [
+                    self.model(**{self.field: key}, **self.defaults(key))
+                    for key in new
+                ],
+                ignore_conflicts=True,
+            )
+            self.created += len(new)
+            self.ids.update(
+                self.model.objects.filter(
+                    **{f'{self.field}__in': new}
+                ).values_list(self.field, 'pk')
+            )
+
+    def __getitem__(self, key):
+        return self.ids[key] if key else None
+
+
+@contextmanager
+def keeping_created(*models):
+    # auto_now_add would stamp every imported row with the import time.
+    fields = [model._meta.get_field('created') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def build_post(number, record, authors, groups):
+    text = record.get('text')
+    if not text or not record.get('author'):
+        raise RecordError(f'Строка {number}: нужны text и author')
+    created = record.get('created')
+    if created:
+        created = parse_datetime(created)
+        if created is None:
+            raise RecordError(f'Строка {number}: неверная дата')
+        if timezone.is_naive(created):
+            created = timezone.make_aware(created)
+    return Post(
+        text=text,
+        created=created or timezone.now(),
+        author_id=authors[record['author']],
+        group_id=groups[record.get('group')],
+        image=record.get('image') or '',
+    )
+
+
+def save_batch(batch, authors, groups):
+    with transaction.atomic():
+        authors.resolve(record.get('author') for _, record in batch)
+        groups.resolve(record.get('group') for _, record in batch)
+        Post.objects.bulk_create(
+            [
+                build_post(number, record, authors, groups)
+                for number, record in batch
+            ]
+        )
+
+
+def import_records(records, batch_size, progress=None):
+    """Saves (line number, record) pairs in batches.
+
+    Returns the numbers of imported posts, created authors and groups.
+    """
+    authors = Lookup(
+        User, 'username', lambda key: {'password': make_password(None)}
+    )
+    groups = Lookup(
+        Group, 'slug', lambda key: {'title': key, 'description': ''}
+    )
+    last_pk = Post.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0
+    total = 0
+    try:
+        with keeping_created(Post):
+            for batch in batched(records, batch_size):
+                save_batch(batch, authors, groups)
+                total += len(batch)
+                if progress is not None:
+                    progress(total)
+    finally:
+        # Batches committed before a broken record still need it.
+        finish_import(last_pk, batch_size)
+    return total, authors.created, groups.created
+
+
+def finish_import(last_pk, batch_size):
+    """Does the signals' work for posts with ids above last_pk."""
+    posts = Post.objects.filter(pk__gt=last_pk).select_related(
+        'author', 'group'
+    ).order_by('-created', '-pk')
+    feeds = {pages.index_feed(), pages.groups_feed()}
+    author_ids, group_ids = set(), set()
+    filled = Counter()
+    batch = list(posts[:batch_size])
+    # Newest first, so fan-out stops once a timeline is full.
+    while batch:
+        with transaction.atomic():
+            search.index_posts(batch)
+            timeline.fan_out_many(batch, filled)
+        counters.recount_posts([post.pk for post in batch], batch_size)
+        for post in batch:
+            author_ids.add(post.author_id)
+            group_ids.add(post.group_id)
+            feeds.add(pages.profile_feed(post.author.username))
+            if post.group_id:
+                feeds.add(pages.group_feed(post.group.slug))
+        oldest = batch[-1]
+        batch = list(posts.filter(
+            Q(created__lt=oldest.created)
+            | Q(created=oldest.created, pk__lt=oldest.pk)
+        )[:batch_size])
+    with transaction.atomic():
+        for user_id in filled:
+            timeline.trim(user_id)
+    # Only the stats of what the import touched are rebuilt.
+    counters.recount_users(author_ids, batch_size)
+    counters.recount_groups(group_ids, batch_size)
+    pages.bump(*feeds)
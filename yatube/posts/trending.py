@@ -0,0 +1,79 @@
+"""Trending posts scored in batch by recent comments and age.
+
+A post scores the comments it got within TRENDING_WINDOW, each weighted
+down by half every TRENDING_HALF_LIFE seconds, divided by its age in
+hours plus two raised to TRENDING_GRAVITY. Only posts commented within
+the window get a score.
+
+recompute() is run periodically by the update_trending command. It
+reads the window's comments batch by batch of posts and scores every
+batch with NumPy outside any transaction, then replaces the PostScore
+table in one short transaction, so writers wait for the swap only and
+the trending page only reads the top rows of its index.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import pages, transfer
+from .models import Comment, Post, PostScore
+
+HOUR = 60 * 60
+
+
+def score(post_ids, post_created, comment_post_ids, comment_created, now):
+    """Scores of posts, all times given as arrays of Unix timestamps.
+
+    post_ids must be sorted; every comment must belong to one of them.
+    """
+    index = np.searchsorted(post_ids, comment_post_ids)
+    weights = np.exp2(-(now - comment_created) / settings.TRENDING_HALF_LIFE)
+    velocity = np.bincount(index, weights=weights, minlength=len(post_ids))
+    hours = np.maximum(now - post_created, 0) / HOUR
+    return velocity / (hours + 2) ** settings.TRENDING_GRAVITY
+
+
+def _score_batch(post_ids, since, now):
+    posts = dict(
+        Post.objects.filter(pk__in=post_ids).values_list('pk', 'created')
+    )
+    post_ids = [pk for pk in post_ids if pk in posts]
+    comments = Comment.objects.filter(
+        post_id__in=post_ids, created__gte=since, created__lte=now
+    ).values_list('post_id', 'created')
+    comment_post_ids, comment_created = [], []
+    for post_id, created in comments.iterator():
+        comment_post_ids.append(post_id)
+        comment_created.append(created.timestamp())
+    scores = score(
+        np.array(post_ids),
+        np.array([posts[pk].timestamp() for pk in post_ids]),
+        np.array(comment_post_ids, dtype=int),
+        np.array(comment_created, dtype=float),
+        now.timestamp(),
+    )
+    return [
+        PostScore(post_id=pk, score=value, computed=now)
+        for pk, value in zip(post_ids, scores.tolist())
+    ]
+
+
+def recompute(now=None, batch_size=None):
+    """Rewrites the PostScore table, returns the number of scored posts."""
+    now = now or timezone.now()
+    batch_size = batch_size or settings.TRENDING_BATCH_SIZE
+    since = now - timedelta(seconds=settings.TRENDING_WINDOW)
+    post_ids = Comment.objects.filter(
+        created__gte=since, created__lte=now
+    ).order_by('post_id').values_list('post_id', flat=True).distinct()
+    scores = []
+    for batch in transfer.batched(post_ids.iterator(), batch_size):
+        scores.extend(_score_batch(batch, since, now))
+    with transaction.atomic():
+        PostScore.objects.all().delete()
+        PostScore.objects.bulk_create(scores, batch_size=batch_size)
+    pages.bump(pages.trending_feed())
+    return len(scores)
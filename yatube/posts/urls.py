@@ -1,6 +1,5 @@
 from django.contrib.auth.decorators import login_required
 from django.urls import path
-from django.views.decorators.cache import cache_page
 
 from . import views
 
@@ -9,10 +8,20 @@ app_name = 'posts'
 urlpatterns = [
     path(
         '',
-        cache_page(20)(views.IndexView.as_view()),
+        views.IndexView.as_view(),
         name='index'
     ),
 
+    path(
+        'trending/',
+        views.TrendingView.as_view(),
+        name='trending'
+    ),
+    path(
+        'groups/',
+        views.GroupDirectoryView.as_view(),
+        name='groups'
+    ),
     path(
         'group/<slug:slug>/',
         views.GroupView.as_view(),
@@ -28,6 +37,11 @@ urlpatterns = [
         views.PostDetailView.as_view(),
         name='post_detail'
     ),
+    path(
+        'search/',
+        views.SearchView.as_view(),
+        name='search'
+    ),
     path(
         'create/',
         views.PostCreateView.as_view(),
@@ -38,6 +52,11 @@ urlpatterns = [
         login_required(views.PostEditView.as_view()),
         name='post_edit'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.CommentListView.as_view(),
+        name='comments'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.CommentCreateView.as_view(),
@@ -1,23 +1,68 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Count, F, Max
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.views.generic import CreateView, ListView, UpdateView
 
+from core import identity
+from core.conditional import ConditionalGetMixin
+from core.paginators import CursorPaginationMixin, InvalidCursor
+
+from . import cards, counters, feeds, follows, pages, search
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post
+from .models import Follow, Group, GroupStats, Post
 
 User = get_user_model()
 
 
-class IndexView(ListView):
+class PostCardsMixin:
+    """Prepares cached post cards of the current page."""
+    follow_buttons = False
 
-    model = Post
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        cards.attach_versions(context['object_list'])
+        show_buttons = (
+            self.follow_buttons and self.request.user.is_authenticated
+        )
+        if show_buttons:
+            follows.attach_states(context['object_list'], self.request.user)
+        context['card_timeout'] = settings.POST_CARD_TIMEOUT
+        context['follow_buttons'] = show_buttons
+        return context
+
+
+class FeedValidatorsMixin(ConditionalGetMixin):
+    """Conditional GET of pages versioned by feed generations."""
+
+    def get_version_keys(self):
+        keys = [
+            pages.FEED_KEY.format(feed)
+            for feed in (*self.get_feeds(), pages.groups_feed())
+        ]
+        if self.request.user.is_authenticated:
+            keys.append(follows.follows_key(self.request.user))
+        return keys
+
+
+class IndexView(
+    FeedValidatorsMixin, pages.FeedPageCacheMixin, PostCardsMixin,
+    CursorPaginationMixin, ListView
+):
+
+    queryset = feeds.index_feed()
+
+    follow_buttons = True
 
     paginate_by = settings.POSTS_AMOUNT
 
     template_name = 'posts/index.html'
 
+    def get_feeds(self):
+        return [pages.index_feed()]
+
     def get_context_data(self, **kwargs):
         context = super(IndexView, self).get_context_data(**kwargs)
         title = "Последние обновления на сайте"
@@ -28,13 +73,22 @@ class IndexView(ListView):
         return context
 
 
-class GroupView(ListView):
+class GroupView(
+    FeedValidatorsMixin, pages.FeedPageCacheMixin, PostCardsMixin,
+    CursorPaginationMixin, ListView
+):
     paginate_by = settings.POSTS_AMOUNT
     template_name = 'posts/group_list.html'
+    follow_buttons = True
+
+    def get_feeds(self):
+        return [pages.group_feed(self.kwargs['slug'])]
 
     def get_queryset(self):
-        self.group = get_object_or_404(Group, slug=self.kwargs['slug'])
-        self.posts_list = self.group.posts.select_related('author')
+        self.group = identity.get_object_or_404(
+            Group, slug=self.kwargs['slug']
+        )
+        self.posts_list = feeds.group_feed(self.group)
         return self.posts_list
 
     def get_context_data(self, **kwargs):
@@ -48,52 +102,133 @@ class GroupView(ListView):
         return context
 
 
-class ProfileView(ListView):
+class GroupDirectoryView(
+    FeedValidatorsMixin, pages.FeedPageCacheMixin, CursorPaginationMixin,
+    ListView
+):
+    """Groups by size or latest activity, read from their stats rows."""
+    template_name = 'posts/groups.html'
+    paginate_by = settings.GROUPS_AMOUNT
+    SORTS = {
+        'posts': 'posts',
+        'active': 'last_post',
+    }
+
+    def get_sort(self):
+        sort = self.request.GET.get('sort')
+        return sort if sort in self.SORTS else 'posts'
+
+    def get_feeds(self):
+        # Every post change bumps the index feed.
+        return [pages.index_feed()]
+
+    def get_cursor_field(self):
+        return self.SORTS[self.get_sort()]
+
+    def get_queryset(self):
+        field = self.get_cursor_field()
+        return GroupStats.objects.select_related('group').order_by(
+            F(field).desc(nulls_last=True), '-group'
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super(GroupDirectoryView, self).get_context_data(**kwargs)
+        sort = self.get_sort()
+        context.update({
+            'title': 'Сообщества',
+            'sort': sort,
+            'cursor_params': f'sort={sort}&',
+        }
+        )
+        return context
+
+
+class TrendingView(
+    FeedValidatorsMixin, pages.FeedPageCacheMixin, PostCardsMixin, ListView
+):
+    """Top posts of the score table filled by posts.trending."""
+    template_name = 'posts/trending.html'
+    follow_buttons = True
+
+    def get_feeds(self):
+        # Scores move with the update_trending job, cards with the index.
+        return [pages.trending_feed(), pages.index_feed()]
+
+    def get_queryset(self):
+        return feeds.trending_feed()[:settings.TRENDING_AMOUNT]
+
+    def get_context_data(self, **kwargs):
+        context = super(TrendingView, self).get_context_data(**kwargs)
+        context.update({
+            'title': 'Популярное',
+        }
+        )
+        return context
+
+
+class ProfileView(
+    FeedValidatorsMixin, pages.FeedPageCacheMixin, PostCardsMixin,
+    CursorPaginationMixin, ListView
+):
     template_name = 'posts/profile.html'
     paginate_by = settings.POSTS_AMOUNT
 
+    def get_feeds(self):
+        return [pages.profile_feed(self.kwargs['username'])]
+
     def get_queryset(self):
-        self.user = get_object_or_404(User, username=self.kwargs['username'])
-        self.posts_list = Post.objects.select_related(
-            'group', 'author'
-        ).filter(
-            author=self.user
+        self.user = identity.get_object_or_404(
+            User, username=self.kwargs['username']
         )
+        self.posts_list = feeds.profile_feed(self.user)
         return self.posts_list
 
     def get_context_data(self, **kwargs):
         context = super(ProfileView, self).get_context_data(**kwargs)
-        self.user = get_object_or_404(User, username=self.kwargs['username'])
-        following = False
-        if self.request.user.is_authenticated:
-            following = Follow.objects.filter(
-                user=self.request.user, author=self.user
-            ).exists()
+        self.user = identity.get_object_or_404(
+            User, username=self.kwargs['username']
+        )
+        following = self.user.pk in follows.following_ids(self.request.user)
         title = 'Профайл пользователя ' + self.kwargs['username']
         context.update({
             'title': title,
             'author': self.user,
+            'stats': counters.user_stats(self.user),
             'following': following
         }
         )
         return context
 
 
-class PostDetailView(ListView):
+class PostDetailView(ConditionalGetMixin, CursorPaginationMixin, ListView):
     template_name = 'posts/post_detail.html'
+    paginate_by = settings.COMMENTS_AMOUNT
+
+    def get_version_keys(self):
+        # The same post object is reused by get_queryset.
+        try:
+            post = identity.get(feeds.posts(), pk=self.kwargs['post_id'])
+        except Post.DoesNotExist:
+            return None
+        return [
+            cards.POST_KEY.format(post.pk),
+            cards.AUTHOR_KEY.format(post.author_id),
+            pages.FEED_KEY.format(pages.profile_feed(post.author.username)),
+            pages.FEED_KEY.format(pages.groups_feed()),
+        ]
 
     def get_queryset(self):
-        self.post = get_object_or_404(Post, pk=self.kwargs['post_id'])
-        self.comments_list = Comment.objects.select_related('author').filter(
-            post=self.kwargs['post_id']
+        self.post = identity.get_object_or_404(
+            feeds.posts(), pk=self.kwargs['post_id']
         )
+        self.comments_list = feeds.comments(self.post)
         return self.comments_list
 
     def get_context_data(self, **kwargs):
         context = super(PostDetailView, self).get_context_data(**kwargs)
         title = self.post.text[:30]
         form = CommentForm()
-        posts_total = Post.objects.filter(author=self.post.author).count()
+        posts_total = counters.user_stats(self.post.author).posts
         context.update({
             'post': self.post,
             'posts_total': posts_total,
@@ -104,6 +239,45 @@ class PostDetailView(ListView):
         return context
 
 
+class CommentListView(ConditionalGetMixin, CursorPaginationMixin, ListView):
+    """Further pages of post comments as an HTML fragment or JSON."""
+    template_name = 'posts/includes/comment_list.html'
+    paginate_by = settings.COMMENTS_AMOUNT
+
+    def get_version_keys(self):
+        return [cards.POST_KEY.format(self.kwargs['post_id'])]
+
+    def get_queryset(self):
+        self.post = get_object_or_404(
+            Post.objects.only('pk'), pk=self.kwargs['post_id']
+        )
+        return feeds.comments(self.post)
+
+    def get_context_data(self, **kwargs):
+        context = super(CommentListView, self).get_context_data(**kwargs)
+        context.update({
+            'post': self.post,
+        }
+        )
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get('format') != 'json':
+            return super().render_to_response(context, **response_kwargs)
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created,
+                }
+                for comment in context['object_list']
+            ],
+            'next_cursor': getattr(context['page_obj'], 'next_cursor', None),
+        })
+
+
 class PostCreateView(LoginRequiredMixin, CreateView):
     template_name = 'posts/create_post.html'
     form_class = PostForm
@@ -132,10 +306,16 @@ class PostEditView(LoginRequiredMixin, UpdateView):
     def dispatch(self, request, *args, **kwargs):
         """ Making sure that only authors can update stories """
         obj = self.get_object()
-        if obj.author != self.request.user:
+        if obj.author_id != self.request.user.pk:
             return redirect('posts:post_detail', obj.pk)
         return super(PostEditView, self).dispatch(request, *args, **kwargs)
 
+    def get_object(self, queryset=None):
+        return identity.get_object_or_404(
+            self.get_queryset() if queryset is None else queryset,
+            pk=self.kwargs['post_id']
+        )
+
     def form_valid(self, form):
         form.save()
         return redirect('posts:post_detail', self.kwargs['post_id'])
@@ -157,7 +337,7 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         return redirect('posts:post_detail', post_id=kwargs['post_id'])
 
     def form_valid(self, form):
-        post = get_object_or_404(Post, pk=self.kwargs['post_id'])
+        post = identity.get_object_or_404(Post, pk=self.kwargs['post_id'])
         comment = form.save(commit=False)
         comment.author = self.request.user
         comment.post = post
@@ -165,16 +345,59 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         return redirect('posts:post_detail', post_id=post.pk)
 
 
-class FollowIndexView(LoginRequiredMixin, ListView):
+class FollowIndexView(
+    LoginRequiredMixin, ConditionalGetMixin, PostCardsMixin,
+    CursorPaginationMixin, ListView
+):
     template_name = 'posts/follow.html'
     model = Post
     paginate_by = settings.POSTS_AMOUNT
 
+    def get_version_keys(self):
+        # Every post, comment or author change bumps the index feed.
+        return [
+            pages.FEED_KEY.format(pages.index_feed()),
+            pages.FEED_KEY.format(pages.groups_feed()),
+        ]
+
+    def get_version_parts(self):
+        # A new follow always has the highest pk, so any change of the
+        # followed set moves the count or the maximum.
+        follows = Follow.objects.filter(user=self.request.user).aggregate(
+            total=Count('pk'), last=Max('pk')
+        )
+        return follows['total'], follows['last']
+
     def get_queryset(self):
-        posts_list = Post.objects.filter(
-            author__following__user=self.request.user
+        return feeds.follow_feed(self.request.user)
+
+
+class SearchView(PostCardsMixin, ListView):
+    """Posts ranked by the full-text index, paged with cursors."""
+    template_name = 'posts/search.html'
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        try:
+            ids, self.next_cursor = search.search(
+                self.query,
+                self.request.GET.get('cursor'),
+                settings.POSTS_AMOUNT,
+            )
+        except InvalidCursor as error:
+            raise Http404(error)
+        posts = feeds.posts().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+    def get_context_data(self, **kwargs):
+        context = super(SearchView, self).get_context_data(**kwargs)
+        context.update({
+            'title': 'Поиск',
+            'query': self.query,
+            'next_cursor': self.next_cursor,
+        }
         )
-        return posts_list
+        return context
 
 
 class ProfileFollowView(LoginRequiredMixin, UpdateView):
@@ -182,7 +405,7 @@ class ProfileFollowView(LoginRequiredMixin, UpdateView):
     model = Follow
 
     def get(self, *args, **kwargs):
-        selected_author = User.objects.get(username=self.kwargs['username'])
+        selected_author = identity.get(User, username=self.kwargs['username'])
         if selected_author == self.request.user:
             return redirect('posts:index')
         Follow.objects.get_or_create(
@@ -195,7 +418,7 @@ class ProfileUnfollowView(LoginRequiredMixin, UpdateView):
     model = Follow
 
     def get(self, *args, **kwargs):
-        selected_author = User.objects.get(username=self.kwargs['username'])
+        selected_author = identity.get(User, username=self.kwargs['username'])
         obj = Follow.objects.filter(
             user=self.request.user, author=selected_author
         )
@@ -1,4 +1,9 @@
 import os
+import sys
+
+from core.caches import build_caches
+from core.routers import build_replicas
+from core.sessions import session_engine
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -17,15 +22,79 @@ ALLOWED_HOSTS = [
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
-}
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
+# Named caches: default, pages, fragments, thumbnails, sessions.
+# See core.caches for the backends YATUBE_CACHE_BACKEND accepts.
+CACHES = build_caches(
+    os.environ.get('YATUBE_CACHE_BACKEND', 'locmem' if TESTING else 'file'),
+    os.environ.get(
+        'YATUBE_CACHE_LOCATION', os.path.join(BASE_DIR, 'django_cache')
+    ),
+)
+SESSION_ENGINE = session_engine(
+    os.environ.get('YATUBE_SESSION_ENGINE', 'cached_db')
+)
+SESSION_CACHE_ALIAS = 'sessions'
+# Only modified sessions are written, see core.sessions.
+SESSION_SAVE_EVERY_REQUEST = False
+THUMBNAIL_CACHE = 'thumbnails'
 
 
 POSTS_AMOUNT = 10
 COMMENTS_AMOUNT = 10
+GROUPS_AMOUNT = 20
+
+# Follow feed: how many post ids a precomputed timeline keeps and how
+# many followers an author may have before their posts are read on the fly.
+TIMELINE_LENGTH = 500
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Rendered post cards are cached under versioned keys, see posts.cards.
+POST_CARD_TIMEOUT = 60 * 60
+# Thumbnails rendered in the background for every new post image. The
+# geometries must match the {% thumbnail %} tags of the post templates.
+POST_THUMBNAILS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+THUMBNAIL_WORKERS = 0 if TESTING else 2
+# Uploaded post images are normalized, see posts.images.
+POST_IMAGE_MAX_SIZE = (1920, 1920)
+POST_IMAGE_QUALITY = 85
+POST_IMAGE_FORMAT = None
+# Feed pages are cached under feed generations, see posts.pages.
+FEED_PAGE_TIMEOUT = 60 * 60 * 6
+# Trending posts, see posts.trending: comments of the last two days,
+# each counting half as much every six hours, over the post age in
+# hours plus two to the power of TRENDING_GRAVITY.
+TRENDING_AMOUNT = 20
+TRENDING_WINDOW = 60 * 60 * 48
+TRENDING_HALF_LIFE = 60 * 60 * 6
+TRENDING_GRAVITY = 1.5
+TRENDING_BATCH_SIZE = 500
+# Sets of followed author ids behind follow buttons, see posts.follows.
+FOLLOWING_TIMEOUT = 60 * 60 * 24
+# Request metrics served at /metrics, see core.metrics. Requests over a
+# budget are logged; the endpoint is open to scrapers sending
+# METRICS_TOKEN as a bearer token and, with DEBUG on, to INTERNAL_IPS.
+METRICS_ENABLED = os.environ.get('YATUBE_METRICS', '1') == '1'
+METRICS_QUERY_BUDGET = (
+    int(os.environ['YATUBE_METRICS_QUERY_BUDGET'])
+    if os.environ.get('YATUBE_METRICS_QUERY_BUDGET') else None
+)
+METRICS_TIME_BUDGET = (
+    float(os.environ['YATUBE_METRICS_TIME_BUDGET'])
+    if os.environ.get('YATUBE_METRICS_TIME_BUDGET') else None
+)
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN')
+# Probable N+1s and slow queries are logged during development, see
+# core.queries: a query shape run REPEAT_THRESHOLD times in one request
+# or a query taking SLOW_THRESHOLD seconds.
+QUERY_LOG_ENABLED = os.environ.get(
+    'YATUBE_QUERY_LOG', '1' if DEBUG and not TESTING else '0'
+) == '1'
+QUERY_LOG_REPEAT_THRESHOLD = 3
+QUERY_LOG_SLOW_THRESHOLD = 0.1
 
 
 # Application definition
@@ -41,11 +110,16 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
     'debug_toolbar'
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.queries.QueryLogMiddleware',
+    'core.routers.ReplicaMiddleware',
+    'core.identity.IdentityMapMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,8 +164,31 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_DB_CONN_MAX_AGE', 60)),
     }
 }
+# Read replicas, see core.routers. REPLICA_LAG is how many seconds a
+# replica may fall behind the primary.
+DATABASES.update(build_replicas(
+    DATABASES['default'],
+    [
+        location
+        for location in os.environ.get('YATUBE_DB_REPLICAS', '').split(',')
+        if location
+    ],
+))
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+REPLICA_LAG = int(os.environ.get('YATUBE_DB_REPLICA_LAG', 5))
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Applied to every new SQLite connection, see core.database.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
 
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'